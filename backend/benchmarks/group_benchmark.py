@@ -0,0 +1,297 @@
+# backend/benchmarks/group_benchmark.py
+"""Multi-person throughput, tracking and accuracy benchmark.
+
+Groups of N people are composed from single-person landmark streams: the
+synthetic scenarios and, with --recordings, .lmrec files (recordings hold
+one person each, so every recording becomes one member of the group,
+resampled to a common 30 fps timeline and placed in its own part of the
+frame). Frames are fed to GroupMonitor the way a detector delivers them:
+in shuffled order, with a few people missed per frame. The "crossing"
+layout walks people through each other to exercise ID stability.
+
+Reported per group size: tracking + counting latency, people-frames/s,
+ID switches and exact rep accuracy, next to the same frames through N
+separate ExerciseMonitors (identity given for free, i.e. no tracking).
+The target is TARGET_PEOPLE people per frame at TARGET_FPS on one CPU
+core, with tracking + counting taking at most STAGE_BUDGET of the frame.
+
+--video runs the whole pipeline on a clip (MediaPipe PoseLandmarker,
+see pose_pipeline.POSE_LANDMARKER_MODEL) and reports detector time too.
+
+    cd backend
+    python -m benchmarks.group_benchmark --output group.json
+    python -m benchmarks.group_benchmark --recordings recordings/ --sizes 4,8
+    python -m benchmarks.group_benchmark --video class.mp4 --people 6 --exercise squat
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.rep_benchmark import _git_commit
+from benchmarks.synthetic_poses import generate
+from exercise_monitor import ExerciseMonitor
+from landmark_recording import LandmarkRecording, array_to_landmarks
+from multi_person import GroupMonitor
+
+TARGET_PEOPLE = 8
+TARGET_FPS = 30
+STAGE_BUDGET = 0.05  # share of the frame budget left over from pose detection
+
+FPS = 30.0
+
+
+# -------------------- Building groups --------------------
+def synthetic_streams(exercise, n, seed=0):
+    """n people doing `exercise` at slightly different tempos: [(timestamps, frames, expected reps)]"""
+    return [generate(exercise, reps=10, period=1.6 + 0.15 * (k % 5), noise=0.004, seed=seed + k) + (10,)
+            for k in range(n)]
+
+
+def recording_streams(recordings_dir):
+    """{exercise: [(timestamps, frames, expected reps or None)]} from a directory of .lmrec files"""
+    streams = {}
+    for name in sorted(os.listdir(recordings_dir)):
+        if not name.endswith(".lmrec"):
+            continue
+        recording = LandmarkRecording(os.path.join(recordings_dir, name))
+        exercise = recording.metadata.get("exercise")
+        timestamps, frames = recording.arrays()
+        if exercise and len(frames):
+            streams.setdefault(exercise, []).append(
+                (timestamps - timestamps[0], frames, recording.metadata.get("expected_reps")))
+    return streams
+
+
+def compose(streams, layout="side_by_side", miss=0.03, seed=0):
+    """Merge single-person streams into group frames.
+
+    Returns (timestamps[T], detections: list of (N_t, 33, 4) arrays, person index per detection).
+    """
+    rng = np.random.default_rng(seed)
+    n = len(streams)
+    duration = max(ts[-1] - ts[0] for ts, _, _ in streams)
+    timestamps = np.arange(0.0, duration + 1e-9, 1.0 / FPS)
+    scale = min(1.0, 1.6 / n)
+    slots = (np.arange(n) + 0.5) / n
+
+    # Latest frame at or before each grid time; streams that end early hold their last pose
+    per_person = []
+    for ts, frames, _ in streams:
+        idx = np.clip(np.searchsorted(ts - ts[0], timestamps, side="right") - 1, 0, len(frames) - 1)
+        per_person.append(frames[idx])
+    group = np.stack(per_person, axis=1).astype(np.float32)       # (T, n, 33, 4)
+
+    if layout == "crossing":
+        # Person k walks from its own slot to its mirror slot, passing through the others
+        progress = timestamps / max(duration, 1e-9)
+        centers = slots[None, :] + (slots[::-1] - slots)[None, :] * progress[:, None]
+    else:
+        centers = np.broadcast_to(slots, (len(timestamps), n))
+    group[..., 0] = centers[..., None] + (group[..., 0] - 0.5) * scale
+    group[..., 1] = 0.5 + (group[..., 1] - 0.5) * scale
+
+    detections, people = [], []
+    for frame in group:
+        order = rng.permutation(n)
+        order = order[rng.random(n) >= miss]
+        detections.append(frame[order])
+        people.append(order)
+    return timestamps, detections, people
+
+
+# -------------------- Running --------------------
+def run_group(exercise, timestamps, detections, people, n, repeat=3):
+    """(per-frame latencies in us of the fastest run, reps per person, ID switches)"""
+    best = None
+    for _ in range(repeat):
+        group = GroupMonitor(exercise, max_people=n)
+        latencies = np.empty(len(timestamps))
+        ids = [[] for _ in range(n)]
+        clock = time.perf_counter_ns
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for i, (ts, poses) in enumerate(zip(timestamps, detections)):
+                start = clock()
+                track_ids, _ = group.update(poses, ts)
+                latencies[i] = clock() - start
+                for person, track_id in zip(people[i].tolist(), track_ids.tolist()):
+                    ids[person].append(track_id)
+        if best is None or latencies.sum() < best[0].sum():
+            best = latencies, group.current_data, ids
+
+    latencies, data, ids = best
+    reps_by_id = {p['id']: p['reps'] for p in data['people']}
+    reps, switches = [], 0
+    for track_ids in ids:
+        seen = [t for t in track_ids if t >= 0]
+        switches += sum(a != b for a, b in zip(seen, seen[1:]))
+        # A person's count is the one on the track they held last
+        reps.append(reps_by_id.get(seen[-1], 0) if seen else 0)
+    return latencies / 1000.0, reps, switches
+
+
+def run_baseline(exercise, timestamps, detections, people, n):
+    """Per-frame latencies (us) of one ExerciseMonitor per person, identities known"""
+    landmarks = [[array_to_landmarks(p) for p in poses] for poses in detections]
+    monitors = [ExerciseMonitor() for _ in range(n)]
+    latencies = np.empty(len(timestamps))
+    clock = time.perf_counter_ns
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for i, ts in enumerate(timestamps):
+            start = clock()
+            for person, lm in zip(people[i], landmarks[i]):
+                monitors[person].analyze(exercise, lm, ts)
+            latencies[i] = clock() - start
+    return latencies / 1000.0
+
+
+def summarize(source, exercise, layout, n, latencies, baseline, reps, expected, switches):
+    total_s = latencies.sum() / 1e6
+    scored = [(r, e) for r, e in zip(reps, expected) if e is not None]
+    return {
+        'source': source,
+        'exercise': exercise,
+        'layout': layout,
+        'people': n,
+        'frames': int(len(latencies)),
+        'latency_us': {
+            'p50': round(float(np.percentile(latencies, 50)), 1),
+            'p99': round(float(np.percentile(latencies, 99)), 1),
+            'mean': round(float(latencies.mean()), 1),
+        },
+        'baseline_p50_us': round(float(np.percentile(baseline, 50)), 1),
+        'speedup': round(float(baseline.sum() / max(latencies.sum(), 1e-9)), 2),
+        'people_frames_per_s': round(n * len(latencies) / total_s, 0) if total_s else None,
+        'id_switches': switches,
+        'counted_reps': reps,
+        'expected_reps': expected,
+        'exact_rep_accuracy': round(sum(r == e for r, e in scored) / len(scored), 3) if scored else None,
+    }
+
+
+def run(sizes=(1, 2, 4, 8, 16), exercise="squat", recordings_dir=None, repeat=3, seed=0):
+    cases = []
+    groups = [("synthetic", exercise, layout, n, synthetic_streams(exercise, n, seed))
+              for layout in ("side_by_side", "crossing") for n in sizes]
+    if recordings_dir:
+        for ex, streams in recording_streams(recordings_dir).items():
+            for n in sizes:
+                members = [streams[k % len(streams)] for k in range(n)]
+                groups.append(("recordings", ex, "side_by_side", n, members))
+
+    for source, ex, layout, n, streams in groups:
+        timestamps, detections, people = compose(streams, layout, seed=seed)
+        latencies, reps, switches = run_group(ex, timestamps, detections, people, n, repeat)
+        baseline = run_baseline(ex, timestamps, detections, people, n)
+        cases.append(summarize(source, ex, layout, n, latencies, baseline, reps,
+                               [e for _, _, e in streams], switches))
+
+    budget_us = 1e6 / TARGET_FPS * STAGE_BUDGET
+    at_target = [c for c in cases if c['people'] == TARGET_PEOPLE and c['source'] == "synthetic"]
+    return {
+        'commit': _git_commit(),
+        'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': f"{platform.system()} {platform.machine()} {platform.processor() or ''}".strip(),
+        'target': {
+            'people': TARGET_PEOPLE,
+            'fps': TARGET_FPS,
+            'stage_budget_us': round(budget_us, 1),
+            # None when TARGET_PEOPLE is not among the sizes run
+            'met': all(c['latency_us']['p99'] <= budget_us for c in at_target) if at_target else None,
+        },
+        'cases': cases,
+    }
+
+
+def run_video(path, people, exercise, model_path=None, max_frames=None):
+    """Detector + tracking + counting on a video file"""
+    import cv2
+    from pose_pipeline import POSE_LANDMARKER_MODEL, create_multi_pose, detect_people
+
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or FPS
+    group = GroupMonitor(exercise, max_people=people)
+    detect_ms, track_ms, counts = [], [], []
+    with create_multi_pose(people, model_path or POSE_LANDMARKER_MODEL) as landmarker:
+        frame_index = 0
+        while max_frames is None or frame_index < max_frames:
+            success, frame = cap.read()
+            if not success:
+                break
+            timestamp = frame_index / fps
+            frame_index += 1
+            start = time.perf_counter()
+            poses = detect_people(landmarker, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), timestamp)
+            detected = time.perf_counter()
+            group.update(poses, timestamp)
+            detect_ms.append((detected - start) * 1000)
+            track_ms.append((time.perf_counter() - detected) * 1000)
+            counts.append(len(poses))
+    cap.release()
+    if not detect_ms:
+        raise ValueError(f"No frames read from {path}")
+
+    total = np.array(detect_ms) + np.array(track_ms)
+    return {
+        'video': path,
+        'frames': len(total),
+        'people_per_frame': round(float(np.mean(counts)), 2),
+        'tracks_started': group.tracker._next_id - 1,
+        'detect_ms_p50': round(float(np.percentile(detect_ms, 50)), 2),
+        'track_ms_p50': round(float(np.percentile(track_ms, 50)), 3),
+        'fps': round(1000 / float(np.mean(total)), 1),
+        'people': group.current_data['people'],
+    }
+
+
+def print_report(report):
+    print(f"commit {report['commit']}  python {report['python']}  numpy {report['numpy']}  {report['machine']}")
+    print(f"{'source':<10} {'exercise':<8} {'layout':<12} {'N':>3} {'p50 us':>8} {'p99 us':>8} "
+          f"{'base us':>8} {'speedup':>7} {'ppl-frm/s':>10} {'id sw':>5} {'reps ok':>7}")
+    for c in report['cases']:
+        accuracy = "-" if c['exact_rep_accuracy'] is None else f"{c['exact_rep_accuracy']:.0%}"
+        print(f"{c['source']:<10} {c['exercise']:<8} {c['layout']:<12} {c['people']:>3} "
+              f"{c['latency_us']['p50']:>8.1f} {c['latency_us']['p99']:>8.1f} {c['baseline_p50_us']:>8.1f} "
+              f"{c['speedup']:>6.1f}x {c['people_frames_per_s'] or 0:>10.0f} {c['id_switches']:>5} {accuracy:>7}")
+    t = report['target']
+    print(f"\ntarget: {t['people']} people at {t['fps']} fps with tracking + counting "
+          f"<= {t['stage_budget_us']} us p99 per frame: {({True: 'met', False: 'NOT met'}).get(t['met'], 'not measured')}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1,2,4,8,16", help="comma-separated group sizes")
+    parser.add_argument("--exercise", default="squat")
+    parser.add_argument("--recordings", help="directory of .lmrec files to build groups from")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per case (fastest is kept)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--video", help="run detection + tracking + counting on this clip instead")
+    parser.add_argument("--people", type=int, default=TARGET_PEOPLE, help="max people to detect in --video")
+    parser.add_argument("--model", help="PoseLandmarker .task model for --video")
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    if args.video:
+        report = run_video(args.video, args.people, args.exercise, args.model)
+        print(json.dumps({k: v for k, v in report.items() if k != 'people'}, indent=2))
+    else:
+        sizes = [int(s) for s in args.sizes.split(",")]
+        report = run(sizes, args.exercise, args.recordings, args.repeat, args.seed)
+        print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+# backend/benchmarks/load_test.py
+"""Load test: unified gateway vs the three separate Flask dev servers.
+
+Drives a fixed mix of status, search, meal-analysis and recommendation
+requests at a given concurrency and reports requests/sec and latency
+percentiles per endpoint.
+
+    cd backend
+    # against servers you already started
+    python -m benchmarks.load_test --mode gateway --gateway http://localhost:8000
+    python -m benchmarks.load_test --mode split
+    # or let the harness start/stop each setup in turn and compare
+    python -m benchmarks.load_test --launch --concurrency 32 --duration 20
+    # also log and read exercise history, against an in-memory database
+    # (needs mongomock: pip install -r requirements-dev.txt)
+    python -m benchmarks.load_test --launch --memory-db
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (service, method, path, json body)
+MIX = [
+    ('pose', 'GET', '/status', None),
+    ('diet', 'GET', '/diet/status', None),
+    ('nutrition', 'GET', '/nutrition/status', None),
+    ('nutrition', 'POST', '/nutrition/search', {'query': 'banana'}),
+    ('nutrition', 'POST', '/nutrition/analyze-meal', {'food_items': ['apple', 'rice', 'chicken breast', 'broccoli']}),
+    ('diet', 'POST', '/diet/recommend', {'query': 'high protein breakfast', 'ingredients': ['eggs', 'avocado']}),
+]
+
+# Writes go to the database, so these only run against launched servers with --memory-db
+HISTORY_MIX = [
+    ('pose', 'POST', '/log_exercise', {'user_id': 'load-test', 'exercise': 'squat', 'reps': 12}),
+    ('pose', 'GET', '/exercise_history?user_id=load-test&period=day&days=7', None),
+]
+
+SPLIT_URLS = {
+    'pose': 'http://localhost:5000',
+    'diet': 'http://localhost:5002',
+    'nutrition': 'http://localhost:5003',
+}
+
+SETUPS = {
+    'split': [['server.py'], ['diet_server.py'], ['nutrition_server.py']],
+    'gateway': [['gateway.py']],
+}
+
+
+async def _worker(client, bases, deadline, offset, samples, mix=MIX):
+    i = offset
+    while time.perf_counter() < deadline:
+        service, method, path, body = mix[i % len(mix)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, bases[service] + path, json=body)
+            ok = response.status_code < 500
+        except httpx.HTTPError:
+            ok = False
+        samples.append((path.split('?')[0], time.perf_counter() - start, ok))
+
+
+async def run_load(bases, concurrency, duration, warmup=2.0, mix=MIX):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        # Warm caches and lazy models so both setups are measured in steady state
+        await asyncio.gather(*(_worker(client, bases, time.perf_counter() + warmup, i, [], mix) for i in range(len(mix))))
+
+        samples = []
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(_worker(client, bases, deadline, i, samples, mix) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return summarize(samples, elapsed)
+
+
+def _stats(latencies, count, errors, elapsed):
+    ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        'requests': count,
+        'errors': errors,
+        'rps': round(count / elapsed, 1),
+        'p50_ms': round(float(np.percentile(ms, 50)), 2),
+        'p95_ms': round(float(np.percentile(ms, 95)), 2),
+        'p99_ms': round(float(np.percentile(ms, 99)), 2),
+    }
+
+
+def summarize(samples, elapsed):
+    by_path = {}
+    for path, latency, ok in samples:
+        by_path.setdefault(path, []).append((latency, ok))
+    return {
+        'overall': _stats([l for _, l, _ in samples], len(samples), sum(not ok for *_, ok in samples), elapsed),
+        'endpoints': {
+            path: _stats([l for l, _ in rows], len(rows), sum(not ok for _, ok in rows), elapsed)
+            for path, rows in by_path.items()
+        },
+    }
+
+
+def _launch(setup, memory_db=False):
+    env = dict(os.environ, MONGO_URI="memory://") if memory_db else None
+    return [subprocess.Popen([sys.executable, *cmd], cwd=BACKEND_DIR, start_new_session=True, env=env,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            for cmd in SETUPS[setup]]
+
+
+def _wait_ready(bases, timeout=120):
+    deadline = time.time() + timeout
+    urls = {bases['pose'] + '/status', bases['diet'] + '/diet/status', bases['nutrition'] + '/nutrition/status'}
+    while urls and time.time() < deadline:
+        for url in list(urls):
+            try:
+                if httpx.get(url, timeout=2).status_code == 200:
+                    urls.discard(url)
+            except httpx.HTTPError:
+                pass
+        time.sleep(0.5)
+    if urls:
+        raise RuntimeError(f"Services not ready: {sorted(urls)}")
+
+
+def _stop(procs):
+    for proc in procs:
+        # Whole process group, so the Flask debug reloader's child goes too
+        try:
+            os.killpg(proc.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    for proc in procs:
+        proc.wait(timeout=15)
+
+
+def print_report(name, report):
+    o = report['overall']
+    print(f"\n== {name}: {o['rps']} req/s, p50 {o['p50_ms']} ms, p99 {o['p99_ms']} ms, "
+          f"{o['errors']} errors / {o['requests']} requests")
+    for path, s in sorted(report['endpoints'].items()):
+        print(f"   {path:<26} {s['rps']:>8} req/s  p50 {s['p50_ms']:>8} ms  p99 {s['p99_ms']:>8} ms  err {s['errors']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["split", "gateway", "both"], default="both")
+    parser.add_argument("--gateway", default="http://localhost:8000")
+    parser.add_argument("--launch", action="store_true", help="start and stop each setup automatically")
+    parser.add_argument("--memory-db", action="store_true",
+                        help="launch with MONGO_URI=memory:// and add the exercise history endpoints to the mix")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--output", help="write the JSON results here")
+    args = parser.parse_args(argv)
+    if args.memory_db and not args.launch:
+        parser.error("--memory-db only applies to servers started with --launch")
+    mix = MIX + HISTORY_MIX if args.memory_db else MIX
+
+    modes = ["split", "gateway"] if args.mode == "both" else [args.mode]
+    results = {}
+    for mode in modes:
+        bases = SPLIT_URLS if mode == "split" else dict.fromkeys(SPLIT_URLS, args.gateway)
+        procs = _launch(mode, args.memory_db) if args.launch else []
+        try:
+            if args.launch:
+                _wait_ready(bases)
+            results[mode] = asyncio.run(run_load(bases, args.concurrency, args.duration, mix=mix))
+        finally:
+            _stop(procs)
+        print_report(mode, results[mode])
+
+    if len(results) == 2:
+        s, g = results['split']['overall'], results['gateway']['overall']
+        print(f"\ngateway vs split: {g['rps'] / s['rps']:.2f}x req/s, "
+              f"p99 {g['p99_ms']} ms vs {s['p99_ms']} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({'concurrency': args.concurrency, 'duration': args.duration, 'results': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# backend/benchmarks/payload_benchmark.py
+"""Payload size and serialization time for the recommendation and nutrition responses.
+
+Builds a /diet/recommend and a /nutrition/analyze-meal payload (real model
+output when the diet model can warm up, otherwise raw meal rows; nutrition
+from the local food table, so no network) and encodes each one:
+
+  * jsonify       - the previous path (Flask's default JSON provider)
+  * fast          - serialization.encode, full records
+  * fields        - fast, projected to the fields the frontend renders
+  * +gzip / +br   - the same, compressed as negotiated from Accept-Encoding
+  * 304           - a repeated identical GET revalidated with If-None-Match
+
+    cd backend
+    python -m benchmarks.payload_benchmark --output payloads.json
+"""
+import argparse
+import json
+import sys
+import time
+
+import diet_server
+import nutrition_server
+import serialization
+from serialization import encode, project_all
+
+QUERY = "high protein breakfast"
+INGREDIENTS = ["eggs", "avocado", "spinach"]
+FOODS = ["apple", "banana", "chicken breast", "rice", "broccoli", "eggs", "salmon", "oats"]
+
+# What src/NLPDiet.jsx and src/NutritionTracker.jsx actually read
+DIET_FIELDS = ("id", "name", "description", "calories", "protein", "carbs", "fat",
+               "prep_time", "cuisine", "similarity_score", "hybrid_score")
+NUTRITION_FIELDS = ("name", "calories", "protein", "carbs", "fat", "fiber", "sugar")
+
+
+def diet_payload(n=5):
+    if diet_server.diet_warmup.wait(60):
+        recommendations = diet_server.nlp_recommender.hybrid_recommendation(QUERY, INGREDIENTS, n)
+    else:
+        # No NLTK data here: same row shape, without the ranking
+        print(f"diet model unavailable (warm-up {diet_server.diet_warmup.state}); using raw meal rows")
+        import numpy as np
+        rows = diet_server.NLPDietRecommender._create_comprehensive_dataset(None)
+        recommendations = [dict(rows.iloc[i].to_dict(), hybrid_score=np.float64(0.5)) for i in range(min(n, len(rows)))]
+    return lambda fields: {
+        "success": True,
+        "query": QUERY,
+        "method": "hybrid",
+        "recommendations": project_all(recommendations, fields),
+        "count": len(recommendations)
+    }
+
+
+def nutrition_payload():
+    tracker = nutrition_server.nutrition_tracker
+    foods = [tracker._search_local_database(f) for f in FOODS]
+
+    def build(fields):
+        analysis = tracker._total_nutrition(foods)
+        analysis['foods'] = project_all(analysis['foods'], fields)
+        return {"success": True, "food_count": len(FOODS), "total_nutrition": analysis}
+    return build
+
+
+def _time_us(fn, repeat, number=200):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1e6
+
+
+def measure(name, build, fields, repeat=5):
+    full, projected = build(None), build(fields)
+    rows = []
+
+    with diet_server.app.test_request_context():
+        body = diet_server.app.json.response(full).get_data()
+        rows.append(("jsonify", len(body), _time_us(lambda: diet_server.app.json.response(full).get_data(), repeat)))
+
+    encodings = ["gzip"] + (["br"] if serialization.brotli is not None else [])
+    for label, payload in (("fast", full), ("fields", projected)):
+        _, body, headers = encode(payload)
+        rows.append((label, len(body), _time_us(lambda: encode(payload), repeat)))
+        for encoding in encodings:
+            _, body, _ = encode(payload, accept_encoding=encoding)
+            rows.append((f"{label}+{encoding}", len(body),
+                         _time_us(lambda: encode(payload, accept_encoding=encoding), repeat)))
+
+    _, body, headers = encode(projected)
+    status, body, _ = encode(projected, if_none_match=headers["ETag"])
+    assert status == 304
+    rows.append(("304", len(body), _time_us(lambda: encode(projected, if_none_match=headers["ETag"]), repeat)))
+
+    base_bytes, base_us = rows[0][1], rows[0][2]
+    return {
+        'payload': name,
+        'variants': [{
+            'variant': label,
+            'bytes': size,
+            'serialize_us': round(us, 1),
+            'size_vs_jsonify': round(size / base_bytes, 3),
+            'time_vs_jsonify': round(us / base_us, 3),
+        } for label, size, us in rows],
+    }
+
+
+def print_report(results):
+    print(f"encoder: {'orjson' if serialization.orjson else 'json'}, "
+          f"brotli: {'yes' if serialization.brotli else 'not installed'}")
+    for r in results:
+        print(f"\n{r['payload']}")
+        print(f"  {'variant':<14} {'bytes':>8} {'size':>7} {'us':>9} {'time':>7}")
+        for v in r['variants']:
+            print(f"  {v['variant']:<14} {v['bytes']:>8} {v['size_vs_jsonify']:>6.0%} "
+                  f"{v['serialize_us']:>9.1f} {v['time_vs_jsonify']:>6.0%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs per variant (fastest is kept)")
+    parser.add_argument("--output", help="write the JSON results here")
+    args = parser.parse_args(argv)
+
+    results = [
+        measure("/diet/recommend", diet_payload(), DIET_FIELDS, args.repeat),
+        measure("/nutrition/analyze-meal", nutrition_payload(), NUTRITION_FIELDS, args.repeat),
+    ]
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({'results': results}, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+# backend/benchmarks/rep_benchmark.py
+"""Headless latency, throughput and accuracy benchmark for ExerciseMonitor.
+
+Runs every synthetic scenario (and any .lmrec recordings) through a fresh
+ExerciseMonitor using the recorded frame timestamps, so results do not
+depend on wall-clock speed and are reproducible across machines.
+
+    cd backend
+    python -m benchmarks.rep_benchmark --output bench.json
+    python -m benchmarks.rep_benchmark --compare bench.json
+    python -m benchmarks.rep_benchmark --recordings recordings/
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.synthetic_poses import scenarios
+from exercise_monitor import ExerciseMonitor
+from landmark_recording import LandmarkRecording, array_to_landmarks
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def run_case(exercise, timestamps, frames, repeat=3):
+    """Returns (reps counted, per-frame latencies in microseconds of the fastest run)"""
+    landmarks = [array_to_landmarks(f) for f in np.asarray(frames, dtype=np.float32)]
+    timestamps = np.asarray(timestamps).tolist()
+    best = None
+    reps = 0
+
+    # The engine prints per frame; send that to devnull rather than the report
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            monitor = ExerciseMonitor()
+            latencies = np.empty(len(landmarks))
+            clock = time.perf_counter_ns
+            data = None
+            for i, (ts, lm) in enumerate(zip(timestamps, landmarks)):
+                start = clock()
+                data = monitor.analyze(exercise, lm, ts) or data
+                latencies[i] = clock() - start
+            reps = data['reps'] if data else 0
+            if best is None or latencies.sum() < best.sum():
+                best = latencies
+
+    return reps, best / 1000.0
+
+
+def summarize(exercise, scenario, latencies, reps, expected):
+    total_s = latencies.sum() / 1e6
+    return {
+        'exercise': exercise,
+        'scenario': scenario,
+        'frames': int(len(latencies)),
+        'expected_reps': expected,
+        'counted_reps': int(reps),
+        'rep_error': None if expected is None else int(reps) - expected,
+        'latency_us': {
+            'mean': round(float(latencies.mean()), 2),
+            'p50': round(float(np.percentile(latencies, 50)), 2),
+            'p95': round(float(np.percentile(latencies, 95)), 2),
+            'p99': round(float(np.percentile(latencies, 99)), 2),
+            'max': round(float(latencies.max()), 2),
+        },
+        'fps': round(len(latencies) / total_s, 1) if total_s else None,
+    }
+
+
+def run(recordings_dir=None, repeat=3, seed=0):
+    cases = []
+    for exercise, scenario, timestamps, frames, expected in scenarios(seed):
+        reps, latencies = run_case(exercise, timestamps, frames, repeat)
+        cases.append(summarize(exercise, scenario, latencies, reps, expected))
+
+    if recordings_dir:
+        for name in sorted(os.listdir(recordings_dir)):
+            if not name.endswith(".lmrec"):
+                continue
+            recording = LandmarkRecording(os.path.join(recordings_dir, name))
+            exercise = recording.metadata.get("exercise", "bicep")
+            timestamps, frames = recording.arrays()
+            reps, latencies = run_case(exercise, timestamps, frames, repeat)
+            cases.append(summarize(exercise, f"recorded:{name}", latencies, reps,
+                                   recording.metadata.get("expected_reps")))
+
+    scored = [c for c in cases if c['expected_reps'] is not None]
+    all_latencies_frames = sum(c['frames'] for c in cases)
+    all_latencies_s = sum(c['frames'] / c['fps'] for c in cases if c['fps'])
+    return {
+        'commit': _git_commit(),
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': f"{platform.system()} {platform.machine()}",
+        'summary': {
+            'cases': len(cases),
+            'frames': all_latencies_frames,
+            'fps': round(all_latencies_frames / all_latencies_s, 1) if all_latencies_s else None,
+            'exact_rep_accuracy': round(sum(c['rep_error'] == 0 for c in scored) / len(scored), 3) if scored else None,
+            'mean_abs_rep_error': round(sum(abs(c['rep_error']) for c in scored) / len(scored), 3) if scored else None,
+        },
+        'cases': cases,
+    }
+
+
+def print_report(report, baseline=None):
+    base = {(c['exercise'], c['scenario']): c for c in (baseline or {}).get('cases', [])}
+    print(f"commit {report['commit']}  python {report['python']}  numpy {report['numpy']}  {report['machine']}")
+    header = f"{'exercise':<9} {'scenario':<22} {'reps':>9} {'p50 us':>8} {'p99 us':>8} {'fps':>10}"
+    if baseline:
+        header += f" {'Δp50':>7} {'Δreps':>6}"
+    print(header)
+    for c in report['cases']:
+        reps = f"{c['counted_reps']}/{c['expected_reps'] if c['expected_reps'] is not None else '?'}"
+        line = (f"{c['exercise']:<9} {c['scenario'][:22]:<22} {reps:>9} "
+                f"{c['latency_us']['p50']:>8.1f} {c['latency_us']['p99']:>8.1f} {c['fps'] or 0:>10.0f}")
+        old = base.get((c['exercise'], c['scenario']))
+        if old:
+            delta = (c['latency_us']['p50'] - old['latency_us']['p50']) / old['latency_us']['p50'] * 100
+            line += f" {delta:>+6.0f}% {c['counted_reps'] - old['counted_reps']:>+6d}"
+        print(line)
+    s = report['summary']
+    print(f"\n{s['cases']} cases, {s['frames']} frames, {s['fps']} frames/s, "
+          f"exact rep accuracy {s['exact_rep_accuracy']}, mean |rep error| {s['mean_abs_rep_error']}")
+    if baseline:
+        b = baseline['summary']
+        print(f"baseline {baseline.get('commit')}: {b['fps']} frames/s, "
+              f"exact rep accuracy {b['exact_rep_accuracy']}, mean |rep error| {b['mean_abs_rep_error']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recordings", help="directory of .lmrec files to include")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per case (fastest is kept)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="baseline JSON report to diff against")
+    args = parser.parse_args(argv)
+
+    report = run(args.recordings, args.repeat, args.seed)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
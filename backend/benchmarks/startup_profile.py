@@ -0,0 +1,198 @@
+# backend/benchmarks/startup_profile.py
+"""Cold-start profile for the three services.
+
+For each service this measures
+  * module import time (python -X importtime) and its heaviest imports,
+  * seconds from process launch until the liveness route (/status) answers,
+  * seconds until the readiness route (/ready) answers 200.
+
+--rev also profiles another git revision (its backend/ exported to a
+temporary directory), so the improvement can be compared side by side.
+Services run against MONGO_URI=memory:// unless MONGO_URI is set, so the
+readiness time doesn't depend on a database being around. The last report
+is kept in benchmarks/startup_report.md:
+
+    cd backend
+    python -m benchmarks.startup_profile --rev f5ab962 --output benchmarks/startup_report.md
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> (module, port, liveness path, readiness path)
+SERVICES = {
+    'pose': ('server', 5000, '/status', '/ready'),
+    'diet': ('diet_server', 5002, '/diet/status', '/diet/ready'),
+    'nutrition': ('nutrition_server', 5003, '/nutrition/status', '/nutrition/ready'),
+}
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_profile(backend_dir, module, top=6):
+    """(total import ms, [(package, cumulative ms), ...] heaviest direct/indirect imports)"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=backend_dir, capture_output=True, text=True, timeout=300)
+    total = None
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _IMPORTTIME.match(line)
+        if not m:
+            continue
+        cumulative, depth, name = int(m.group(2)), len(m.group(3)), m.group(4)
+        if name == module:
+            # Indentation can be skewed by imports running in warm-up threads
+            total = max(total or 0, cumulative / 1000)
+        elif depth <= 3:
+            rows.append((name, cumulative / 1000))
+    if total is None:
+        return None, [], proc.stderr.strip().splitlines()[-1:] or ["import failed"]
+    heaviest = sorted(rows, key=lambda r: r[1], reverse=True)[:top]
+    return total, heaviest, []
+
+
+def _status(url):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, OSError):
+        return None
+
+
+def _failure(url):
+    """The warm-up error if the readiness route reports a failed warm-up, else None"""
+    try:
+        urllib.request.urlopen(url, timeout=1)
+    except urllib.error.HTTPError as e:
+        try:
+            body = json.loads(e.read())
+        except ValueError:
+            return None
+        if isinstance(body, dict) and body.get('state') == 'failed':
+            # Errors such as NLTK's LookupError span a banner of lines; keep one
+            error = " ".join((body.get('error') or 'failed').replace('*', ' ').split())
+            return error if len(error) <= 160 else error[:157] + "..."
+    except (urllib.error.URLError, OSError):
+        pass
+    return None
+
+
+def launch_profile(backend_dir, module, port, live_path, ready_path, timeout=180):
+    """Seconds from launch until liveness answers and until readiness is 200, plus
+    the warm-up error when the service reports that it can't become ready"""
+    start = time.perf_counter()
+    env = {**os.environ, 'MONGO_URI': os.environ.get('MONGO_URI', 'memory://')}
+    proc = subprocess.Popen([sys.executable, f"{module}.py"], cwd=backend_dir, start_new_session=True, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    live = ready = error = None
+    try:
+        while time.perf_counter() - start < timeout and proc.poll() is None:
+            if live is None and _status(f"http://localhost:{port}{live_path}") == 200:
+                live = time.perf_counter() - start
+            if live is not None:
+                code = _status(f"http://localhost:{port}{ready_path}")
+                # Revisions without a readiness route load everything before binding
+                if code == 200 or code == 404:
+                    ready = time.perf_counter() - start if code == 200 else live
+                    break
+                error = "readiness route returned 500" if code == 500 else _failure(f"http://localhost:{port}{ready_path}")
+                if error:
+                    error += f" after {time.perf_counter() - start:.2f} s"
+                    break
+            time.sleep(0.05)
+        else:
+            if ready is None and error is None:
+                error = "process exited during startup" if proc.poll() is not None else f"not ready after {timeout} s"
+    finally:
+        try:
+            os.killpg(proc.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        proc.wait(timeout=15)
+    return live, ready, error
+
+
+def profile(backend_dir, label):
+    rows = []
+    for name, (module, port, live_path, ready_path) in SERVICES.items():
+        total, heaviest, errors = import_profile(backend_dir, module)
+        live, ready, ready_error = launch_profile(backend_dir, module, port, live_path, ready_path)
+        rows.append({'label': label, 'service': name, 'import_ms': total, 'heaviest': heaviest,
+                     'errors': errors, 'live_s': live, 'ready_s': ready, 'ready_error': ready_error})
+    return rows
+
+
+def _fmt(value, unit):
+    return "n/a" if value is None else f"{value:.0f} {unit}" if unit == "ms" else f"{value:.2f} {unit}"
+
+
+def report(rows):
+    lines = [
+        f"Startup profile, {time.strftime('%Y-%m-%d')}, Python {platform.python_version()} on "
+        f"{platform.system()} {platform.machine()} ({os.cpu_count()} CPUs), "
+        f"MONGO_URI={os.environ.get('MONGO_URI', 'memory://')}",
+        "",
+        "| revision | service | import | /status answers | ready |",
+        "|---|---|---|---|---|",
+    ]
+    for r in rows:
+        ready = "failed" if r['ready_error'] else _fmt(r['ready_s'], 's')
+        lines.append(f"| {r['label']} | {r['service']} | {_fmt(r['import_ms'], 'ms')} | "
+                     f"{_fmt(r['live_s'], 's')} | {ready} |")
+    lines.append("")
+    for r in rows:
+        heavy = ", ".join(f"{name} {ms:.0f} ms" for name, ms in r['heaviest'])
+        note = f" (import error: {r['errors'][0]})" if r['errors'] else ""
+        if r['ready_error']:
+            note += f" (not ready: {r['ready_error']})"
+        lines.append(f"- {r['label']} {r['service']}: {heavy or 'n/a'}{note}")
+    return "\n".join(lines)
+
+
+def _git(*args):
+    return subprocess.check_output(["git", *args], cwd=BACKEND_DIR, text=True).strip()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rev", help="also profile this git revision (e.g. HEAD~1) for comparison")
+    parser.add_argument("--output", help="write the markdown report here")
+    args = parser.parse_args(argv)
+
+    rows = []
+    if args.rev:
+        workdir = tempfile.mkdtemp(prefix="startup-profile-")
+        try:
+            toplevel = _git("rev-parse", "--show-toplevel")
+            prefix = os.path.relpath(BACKEND_DIR, toplevel)
+            # Pathspecs are relative to the cwd, so archive from the top level
+            archive = subprocess.check_output(["git", "archive", args.rev, prefix], cwd=toplevel)
+            subprocess.run(["tar", "-x", "-C", workdir], input=archive, check=True)
+            rows += profile(os.path.join(workdir, prefix), _git("rev-parse", "--short", args.rev))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    rows += profile(BACKEND_DIR, _git("rev-parse", "--short", "HEAD") + " (working tree)")
+
+    text = report(rows)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# backend/benchmarks/synthetic_poses.py
+"""Deterministic synthetic landmark trajectories for the five exercises.
+
+Each exercise drives the joint angle ExerciseMonitor measures through a
+known number of reps, so counted reps can be checked exactly. Frames are
+(33, 4) float32 arrays (x, y, z, visibility) like the recording format.
+"""
+import numpy as np
+
+from exercise_monitor import PoseLandmark as PL
+
+EXERCISES = ("bicep", "pushup", "squat", "lunge", "shoulder")
+
+# (joints whose angle is driven, low angle, high angle) per exercise; the angle
+# range spans each RepState's thresholds with some margin on both ends.
+MOTIONS = {
+    'bicep': ((PL.LEFT_SHOULDER, PL.LEFT_ELBOW, PL.LEFT_WRIST),
+              (PL.RIGHT_SHOULDER, PL.RIGHT_ELBOW, PL.RIGHT_WRIST), 40, 172),
+    'pushup': ((PL.LEFT_SHOULDER, PL.LEFT_ELBOW, PL.LEFT_WRIST),
+               (PL.RIGHT_SHOULDER, PL.RIGHT_ELBOW, PL.RIGHT_WRIST), 80, 172),
+    'squat': ((PL.LEFT_HIP, PL.LEFT_KNEE, PL.LEFT_ANKLE),
+              (PL.RIGHT_HIP, PL.RIGHT_KNEE, PL.RIGHT_ANKLE), 70, 178),
+    'lunge': ((PL.LEFT_HIP, PL.LEFT_KNEE, PL.LEFT_ANKLE),
+              (PL.RIGHT_HIP, PL.RIGHT_KNEE, PL.RIGHT_ANKLE), 60, 178),
+    # Shoulder press measures elbow-shoulder against vertical, so the "distal"
+    # joint is the elbow hinged at the shoulder
+    'shoulder': ((None, PL.LEFT_SHOULDER, PL.LEFT_ELBOW),
+                 (None, PL.RIGHT_SHOULDER, PL.RIGHT_ELBOW), 60, 172),
+}
+
+SEGMENT = 0.18  # limb length in normalised image units
+
+
+def _base_pose():
+    frame = np.zeros((33, 4), dtype=np.float32)
+    frame[:, 3] = 0.99
+    # Rough standing skeleton, image coordinates (y grows downwards)
+    frame[:, 0] = 0.5
+    frame[:, 1] = 0.2
+    for idx, (x, y) in {
+        PL.LEFT_SHOULDER: (0.42, 0.30), PL.RIGHT_SHOULDER: (0.58, 0.30),
+        PL.LEFT_ELBOW: (0.42, 0.48), PL.RIGHT_ELBOW: (0.58, 0.48),
+        PL.LEFT_WRIST: (0.42, 0.66), PL.RIGHT_WRIST: (0.58, 0.66),
+        PL.LEFT_HIP: (0.45, 0.55), PL.RIGHT_HIP: (0.55, 0.55),
+        PL.LEFT_KNEE: (0.45, 0.73), PL.RIGHT_KNEE: (0.55, 0.73),
+        PL.LEFT_ANKLE: (0.45, 0.91), PL.RIGHT_ANKLE: (0.55, 0.91),
+    }.items():
+        frame[idx, :2] = (x, y)
+    return frame
+
+
+def _place(frame, joints, angles):
+    """Position the distal joint so the angle at the middle joint equals `angles` (degrees)"""
+    proximal, middle, distal = joints
+    theta = np.radians(angles)
+    if proximal is None:
+        # Angle measured from straight up
+        ref = np.array([0.0, -1.0])
+    else:
+        ref = frame[0, proximal, :2] - frame[0, middle, :2]
+        ref = ref / np.linalg.norm(ref)
+    # Rotate the reference direction by theta (sign picks the outward side)
+    sign = -1.0 if frame[0, middle, 0] < 0.5 else 1.0
+    cos, sin = np.cos(theta), np.sin(sign * theta)
+    dx = ref[0] * cos - ref[1] * sin
+    dy = ref[0] * sin + ref[1] * cos
+    frame[:, distal, 0] = frame[:, middle, 0] + SEGMENT * dx
+    frame[:, distal, 1] = frame[:, middle, 1] + SEGMENT * dy
+
+
+def rep_angles(reps, fps, period, low, high, hold=0.5):
+    """Angle trace starting and ending low, rising to `high` once per rep"""
+    rest = np.full(int(hold * fps), float(low))
+    phase = np.arange(int(reps * period * fps)) / (period * fps)
+    cycle = low + (high - low) * 0.5 * (1 - np.cos(2 * np.pi * phase))
+    return np.concatenate([rest, cycle, rest])
+
+
+def generate(exercise, reps=10, fps=30.0, period=2.0, noise=0.0, occlusion=0.0,
+             drop_frames=0.0, seed=0):
+    """Synthetic trajectory for one exercise.
+
+    noise       std-dev of Gaussian jitter added to x/y (normalised units)
+    occlusion   fraction of frames where the right-side joints are lost
+                (visibility ~0 and positions scattered, as MediaPipe does)
+    drop_frames fraction of frames removed, leaving irregular timestamps
+
+    Returns (timestamps[T], frames[T, 33, 4]).
+    """
+    rng = np.random.default_rng(seed)
+    left, right, low, high = MOTIONS[exercise]
+    angles = rep_angles(reps, fps, period, low, high)
+    frames = np.repeat(_base_pose()[None], len(angles), axis=0)
+    _place(frames, left, angles)
+    _place(frames, right, angles)
+    timestamps = np.arange(len(angles)) / fps
+
+    if noise:
+        frames[:, :, :2] += rng.normal(0, noise, size=frames[:, :, :2].shape).astype(np.float32)
+
+    if occlusion:
+        lost = rng.random(len(frames)) < occlusion
+        joints = [j for j in right if j is not None]
+        frames[np.ix_(lost, joints, [0, 1])] = rng.random((lost.sum(), len(joints), 2)).astype(np.float32)
+        frames[np.ix_(lost, joints, [3])] = 0.05
+
+    if drop_frames:
+        keep = rng.random(len(frames)) >= drop_frames
+        keep[0] = keep[-1] = True
+        frames, timestamps = frames[keep], timestamps[keep]
+
+    return timestamps, frames
+
+
+# name -> (generate() kwargs, expected reps)
+SCENARIOS = {
+    'clean': ({'reps': 10, 'period': 2.0}, 10),
+    'noisy': ({'reps': 10, 'period': 2.0, 'noise': 0.008}, 10),
+    'partial_visibility': ({'reps': 10, 'period': 2.0, 'occlusion': 0.15}, 10),
+    'dropped_frames': ({'reps': 10, 'period': 2.0, 'drop_frames': 0.3}, 10),
+    'fast_tempo': ({'reps': 12, 'period': 1.1}, 12),
+}
+
+
+def scenarios(seed=0):
+    """Yield (exercise, scenario name, timestamps, frames, expected reps)"""
+    for exercise in EXERCISES:
+        for name, (kwargs, expected) in SCENARIOS.items():
+            timestamps, frames = generate(exercise, seed=seed, **kwargs)
+            yield exercise, name, timestamps, frames, expected
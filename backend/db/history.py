@@ -0,0 +1,243 @@
+# backend/db/history.py
+"""Per-user exercise and nutrition history.
+
+Raw events go to time-series collections indexed on (user_id, timestamp).
+Every write also bumps a daily and a weekly rollup document, so history
+queries read one document per day/week instead of scanning raw events.
+
+The raw insert and the rollup updates are separate writes (no transaction),
+so a crash in between leaves the rollups short of that event; the raw
+events are the source of truth and rebuild_rollups() recomputes the
+rollups from them:
+
+    cd backend
+    python -m db.history rebuild [--user USER_ID]
+"""
+from datetime import datetime, timedelta, timezone
+import os
+import threading
+
+EXERCISE_LOGS = "exercise_logs"
+NUTRITION_LOGS = "nutrition_logs"
+EXERCISE_ROLLUPS = "exercise_rollups"
+NUTRITION_ROLLUPS = "nutrition_rollups"
+
+# Same values as pymongo.ASCENDING/DESCENDING; pymongo itself is imported on first use
+ASCENDING, DESCENDING = 1, -1
+
+PERIODS = ("day", "week")
+MACROS = ("calories", "protein", "carbs", "fat", "fiber", "sugar")
+MAX_HISTORY_DAYS = 3660  # history queries look back at most ~10 years
+
+
+def to_utc(value=None):
+    """Normalise None / epoch seconds / ISO string / datetime to an aware UTC datetime.
+
+    Raises ValueError for anything else (including booleans, which are ints to Python).
+    """
+    if value is None:
+        return datetime.now(timezone.utc)
+    if isinstance(value, bool):
+        raise ValueError("timestamp must be epoch seconds or an ISO 8601 string")
+    if isinstance(value, (int, float)):
+        try:
+            return datetime.fromtimestamp(value, timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            raise ValueError(f"timestamp {value} is out of range") from None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            raise ValueError(f"timestamp '{value}' is not an ISO 8601 date/time") from None
+    if not isinstance(value, datetime):
+        raise ValueError("timestamp must be epoch seconds or an ISO 8601 string")
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def check_user_id(user_id):
+    """user_id goes straight into Mongo filters, so only plain strings are accepted
+    (a dict such as {"$ne": 1} would act as a query operator)"""
+    if not isinstance(user_id, str) or not user_id:
+        raise ValueError("user_id must be a non-empty string")
+    return user_id
+
+
+def period_start(ts, period):
+    """Start of the day (UTC midnight) or ISO week (Monday) containing ts"""
+    day = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == "day":
+        return day
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    raise ValueError(f"Unknown period '{period}'")
+
+
+class HistoryStore:
+    def __init__(self, db):
+        self.db = db
+        self.exercise_logs = db[EXERCISE_LOGS]
+        self.nutrition_logs = db[NUTRITION_LOGS]
+        self.exercise_rollups = db[EXERCISE_ROLLUPS]
+        self.nutrition_rollups = db[NUTRITION_ROLLUPS]
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def ensure_schema(self):
+        """Create time-series collections and indexes once per process"""
+        if self._schema_ready:
+            return
+        from pymongo.errors import CollectionInvalid
+
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            for name in (EXERCISE_LOGS, NUTRITION_LOGS):
+                try:
+                    self.db.create_collection(name, timeseries={
+                        'timeField': 'timestamp',
+                        'metaField': 'user_id',
+                        'granularity': 'minutes'
+                    })
+                except CollectionInvalid:
+                    pass  # Already exists (possibly as a plain collection from older deployments)
+                except NotImplementedError:
+                    pass  # In-memory test backend has no time-series support
+                self.db[name].create_index([('user_id', ASCENDING), ('timestamp', DESCENDING)])
+
+            for rollups in (self.exercise_rollups, self.nutrition_rollups):
+                rollups.create_index(
+                    [('user_id', ASCENDING), ('period', ASCENDING), ('start', ASCENDING)],
+                    unique=True
+                )
+            self._schema_ready = True
+
+    def _bump_rollups(self, rollups, user_id, ts, inc):
+        now = datetime.now(timezone.utc)
+        for period in PERIODS:
+            rollups.update_one(
+                {'user_id': user_id, 'period': period, 'start': period_start(ts, period)},
+                {'$inc': inc, '$set': {'updated_at': now}},
+                upsert=True
+            )
+
+    def _read_rollups(self, rollups, user_id, period, days):
+        if period not in PERIODS:
+            raise ValueError(f"period must be one of {PERIODS}")
+        check_user_id(user_id)
+        days = min(max(1, int(days)), MAX_HISTORY_DAYS)
+        since = period_start(datetime.now(timezone.utc) - timedelta(days=days - 1), period)
+        cursor = rollups.find(
+            {'user_id': user_id, 'period': period, 'start': {'$gte': since}},
+            {'_id': 0, 'user_id': 0, 'period': 0}
+        ).sort('start', ASCENDING)
+
+        history = []
+        for doc in cursor:
+            doc['start'] = doc['start'].date().isoformat()
+            doc.pop('updated_at', None)
+            history.append(doc)
+        return history
+
+    def _rebuild(self, logs, rollups, increments, user_id):
+        query = {} if user_id is None else {'user_id': check_user_id(user_id)}
+        totals = {}
+        for event in logs.find(query):
+            ts = to_utc(event['timestamp'])
+            for period in PERIODS:
+                doc = totals.setdefault((event['user_id'], period, period_start(ts, period)), {})
+                for field, value in increments(event).items():
+                    doc[field] = doc.get(field, 0) + value
+
+        rollups.delete_many(query)
+        now = datetime.now(timezone.utc)
+        for (uid, period, start), fields in totals.items():
+            rollups.update_one(
+                {'user_id': uid, 'period': period, 'start': start},
+                {'$set': {**fields, 'updated_at': now}},
+                upsert=True
+            )
+        return len(totals)
+
+    def rebuild_rollups(self, user_id=None):
+        """Recompute the exercise and nutrition rollups of one user (or everyone)
+        from the raw events; returns the number of rollup documents written.
+
+        Writes that land while this runs may be counted twice or not at all,
+        so run it when the user (or the service) is idle.
+        """
+        self.ensure_schema()
+        return (self._rebuild(self.exercise_logs, self.exercise_rollups, _exercise_increments, user_id)
+                + self._rebuild(self.nutrition_logs, self.nutrition_rollups, _nutrition_increments, user_id))
+
+    # --- EXERCISE ---
+    def record_exercise(self, user_id, exercise, reps, timestamp=None):
+        """Store one completed set and fold it into the daily/weekly rollups"""
+        self.ensure_schema()
+        event = {
+            'user_id': check_user_id(user_id),
+            'timestamp': to_utc(timestamp),
+            'exercise': exercise,
+            'reps': int(reps)
+        }
+        self.exercise_logs.insert_one(dict(event))
+        self._bump_rollups(self.exercise_rollups, user_id, event['timestamp'], _exercise_increments(event))
+
+    def exercise_history(self, user_id, period="day", days=30):
+        self.ensure_schema()
+        return self._read_rollups(self.exercise_rollups, user_id, period, days)
+
+    # --- NUTRITION ---
+    def record_nutrition(self, user_id, nutrition, foods=None, timestamp=None):
+        """Store one logged meal (macro totals) and fold it into the daily/weekly rollups"""
+        self.ensure_schema()
+        event = {
+            'user_id': check_user_id(user_id),
+            'timestamp': to_utc(timestamp),
+            'foods': foods or [],
+            **{k: float(nutrition.get(k, 0) or 0) for k in MACROS}
+        }
+        self.nutrition_logs.insert_one(dict(event))
+        self._bump_rollups(self.nutrition_rollups, user_id, event['timestamp'], _nutrition_increments(event))
+
+    def nutrition_history(self, user_id, period="day", days=30):
+        self.ensure_schema()
+        return self._read_rollups(self.nutrition_rollups, user_id, period, days)
+
+
+# Rollup fields each raw event adds to; shared by the live writes and rebuild_rollups()
+def _exercise_increments(event):
+    return {f"reps.{event['exercise']}": event['reps'], f"sets.{event['exercise']}": 1}
+
+
+def _nutrition_increments(event):
+    return {**{k: event.get(k, 0) for k in MACROS}, 'entries': 1}
+
+
+_store = None
+_store_pid = None
+_store_lock = threading.Lock()
+
+
+def get_history_store():
+    """Per-process HistoryStore bound to the lazily created Mongo client"""
+    global _store, _store_pid
+    if _store is None or _store_pid != os.getpid():
+        with _store_lock:
+            if _store is None or _store_pid != os.getpid():
+                from db.mongo import get_db
+                _store = HistoryStore(get_db())
+                _store_pid = os.getpid()
+    return _store
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Exercise/nutrition history maintenance")
+    parser.add_argument("command", choices=["rebuild"], help="rebuild: recompute rollups from the raw events")
+    parser.add_argument("--user", help="only this user (default: everyone)")
+    args = parser.parse_args()
+    written = get_history_store().rebuild_rollups(args.user)
+    print(f"✅ Rebuilt {written} rollup documents")
@@ -1,20 +1,122 @@
-from pymongo import MongoClient
+"""Lazily created, fork-safe MongoDB client.
+
+Nothing connects at import time. The client is built on first use from
+environment settings and rebuilt if the process has forked since, so
+pre-fork servers never share sockets between workers.
+
+Settings (all optional):
+    MONGO_URI                  connection string; "memory://" uses an in-memory
+                               backend (mongomock), unset falls back to localhost
+    MONGO_DB                   database name (default: ai_wellness)
+    MONGO_MAX_POOL_SIZE        max connections per process (default: 20)
+    MONGO_MIN_POOL_SIZE        idle connections kept open (default: 0)
+    MONGO_TIMEOUT_MS           server selection timeout (default: 5000)
+    MONGO_CONNECT_TIMEOUT_MS   socket connect timeout (default: 5000)
+    MONGO_SOCKET_TIMEOUT_MS    per-operation socket timeout (default: 10000)
+    MONGO_READ_PREFERENCE      e.g. primary, primaryPreferred, secondaryPreferred
+"""
 from dotenv import load_dotenv
 import os
+import threading
 
 load_dotenv()
 
-MONGO_URI = os.getenv("MONGO_URI")
-if not MONGO_URI:
-    raise Exception("❌ MONGO_URI not found")
+LOCAL_URI = "mongodb://localhost:27017"
+MEMORY_URI = "memory://"
+
+COLLECTIONS = {
+    "users_col": "users",
+    "nutrition_col": "nutrition_logs",
+    "exercise_col": "exercise_logs",
+    "diet_col": "diet_logs",
+}
+
+_client = None
+_client_pid = None
+_lock = threading.Lock()
+
+
+def _settings():
+    return {
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", "20")),
+        "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+        "serverSelectionTimeoutMS": int(os.getenv("MONGO_TIMEOUT_MS", "5000")),
+        "connectTimeoutMS": int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000")),
+        "socketTimeoutMS": int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "10000")),
+        "readPreference": os.getenv("MONGO_READ_PREFERENCE", "primary"),
+    }
+
+
+def _create_client():
+    uri = os.getenv("MONGO_URI")
+    if uri == MEMORY_URI:
+        try:
+            import mongomock
+        except ImportError:
+            raise ImportError("MONGO_URI=memory:// needs mongomock (pip install -r requirements-dev.txt)") from None
+        return mongomock.MongoClient()
+
+    if not uri:
+        print(f"⚠️ MONGO_URI not set, falling back to {LOCAL_URI}")
+        uri = LOCAL_URI
+
+    from pymongo import MongoClient
+    # connect=False defers the topology threads to the first operation
+    return MongoClient(uri, connect=False, **_settings())
+
+
+def get_client():
+    """Return this process's client, creating it on first use or after a fork"""
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _lock:
+            if _client is None or _client_pid != pid:
+                # A client inherited across fork is unusable; drop it without closing
+                # so the parent's sockets are left alone.
+                _client = _create_client()
+                _client_pid = pid
+    return _client
+
+
+def get_db():
+    return get_client()[os.getenv("MONGO_DB", "ai_wellness")]
+
+
+def get_collection(name):
+    return get_db()[name]
+
+
+def ping(timeout_ms=2000):
+    """Readiness probe: (ok, error message) for a round trip to the server"""
+    import pymongo
+    try:
+        # pymongo.timeout bounds server selection too, unlike maxTimeMS
+        with pymongo.timeout(timeout_ms / 1000):
+            get_client().admin.command("ping")
+        return True, None
+    except Exception as e:
+        if not os.getenv("MONGO_URI"):
+            return False, f"MONGO_URI not set, tried {LOCAL_URI}: {e}"
+        return False, str(e)
 
-client = MongoClient(MONGO_URI)
 
-db = client["ai_wellness"]
+def close():
+    """Close the client for this process (used on graceful shutdown)"""
+    global _client, _client_pid
+    with _lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+        _client_pid = None
 
-users_col = db["users"]
-nutrition_col = db["nutrition_logs"]
-exercise_col = db["exercise_logs"]
-diet_col = db["diet_logs"]
 
-print("✅ MongoDB connected")
+def __getattr__(name):
+    # Keep `from db.mongo import db, users_col, ...` working without connecting at import
+    if name == "client":
+        return get_client()
+    if name == "db":
+        return get_db()
+    if name in COLLECTIONS:
+        return get_collection(COLLECTIONS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
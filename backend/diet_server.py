@@ -1,36 +1,52 @@
 # backend/diet_server.py
-from flask import Flask, request, jsonify
+from flask import Flask, jsonify
 from flask_cors import CORS
-import pandas as pd
-import numpy as np
 import re
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
 import json
 
-# Download required NLTK data
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
+import metrics
+from serialization import json_response, parse_fields, project_all, request_params
+from warmup import Warmup, serving_process, not_ready_response, readiness_response
 
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords')
+# pandas, scikit-learn and NLTK are imported by the warm-up thread (see bottom of
+# file) so the server binds and answers /diet/status without waiting for them.
+pd = TfidfVectorizer = cosine_similarity = None
+word_tokenize = stopwords = WordNetLemmatizer = None
 
-try:
-    nltk.data.find('corpora/wordnet')
-except LookupError:
-    nltk.download('wordnet')
+def _import_nlp_stack():
+    global pd, TfidfVectorizer, cosine_similarity, word_tokenize, stopwords, WordNetLemmatizer
+    import pandas as pd
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+    from nltk.tokenize import word_tokenize
+    from nltk.corpus import stopwords
+    from nltk.stem import WordNetLemmatizer
+
+def _ensure_nltk_data():
+    import nltk
+
+    # Download required NLTK data
+    try:
+        nltk.data.find('tokenizers/punkt')
+    except LookupError:
+        nltk.download('punkt')
+
+    try:
+        nltk.data.find('corpora/stopwords')
+    except LookupError:
+        nltk.download('stopwords')
+
+    try:
+        nltk.data.find('corpora/wordnet')
+    except LookupError:
+        nltk.download('wordnet')
 
 app = Flask(__name__)
 CORS(app)
 
+PREPROCESS_SECONDS = metrics.histogram("diet_preprocess_text_seconds", "Tokenize, filter and lemmatize one text")
+SIMILARITY_SECONDS = metrics.histogram("diet_similarity_seconds", "Cosine similarity scoring and ranking", ["model"])
+
 class NLPDietRecommender:
     def __init__(self):
         self.meal_data = self._create_comprehensive_dataset()
@@ -107,12 +123,13 @@ class NLPDietRecommender:
         if pd.isna(text):
             return ""
         
-        text = text.lower()
-        text = re.sub(r'[^\w\s]', ' ', text)
-        tokens = word_tokenize(text)
-        tokens = [token for token in tokens if token not in self.stop_words and token not in self.nutrition_stop_words]
-        tokens = [self.lemmatizer.lemmatize(token) for token in tokens]
-        return ' '.join(tokens)
+        with PREPROCESS_SECONDS.time():
+            text = text.lower()
+            text = re.sub(r'[^\w\s]', ' ', text)
+            tokens = word_tokenize(text)
+            tokens = [token for token in tokens if token not in self.stop_words and token not in self.nutrition_stop_words]
+            tokens = [self.lemmatizer.lemmatize(token) for token in tokens]
+            return ' '.join(tokens)
     
     def _train_nlp_models(self):
         """Train NLP models on meal data"""
@@ -135,8 +152,9 @@ class NLPDietRecommender:
         """Content-based filtering using TF-IDF"""
         processed_query = self._preprocess_text(query)
         query_vector = self.vectorizer.transform([processed_query])
-        similarities = cosine_similarity(query_vector, self.tfidf_matrix).flatten()
-        top_indices = similarities.argsort()[-n_recommendations:][::-1]
+        with SIMILARITY_SECONDS.labels('content').time():
+            similarities = cosine_similarity(query_vector, self.tfidf_matrix).flatten()
+            top_indices = similarities.argsort()[-n_recommendations:][::-1]
         
         recommendations = []
         for idx in top_indices:
@@ -153,8 +171,9 @@ class NLPDietRecommender:
             
         ingredients_text = ' '.join(available_ingredients)
         ingredients_vector = self.ingredient_vectorizer.transform([ingredients_text])
-        similarities = cosine_similarity(ingredients_vector, self.ingredient_matrix).flatten()
-        top_indices = similarities.argsort()[-n_recommendations:][::-1]
+        with SIMILARITY_SECONDS.labels('ingredients').time():
+            similarities = cosine_similarity(ingredients_vector, self.ingredient_matrix).flatten()
+            top_indices = similarities.argsort()[-n_recommendations:][::-1]
         
         recommendations = []
         for idx in top_indices:
@@ -190,27 +209,54 @@ class NLPDietRecommender:
         
         return final_recommendations
 
-# Initialize the model
-nlp_recommender = NLPDietRecommender()
+# Initialize the model in the background
+nlp_recommender = None
+
+def _warm_up(warmup):
+    global nlp_recommender
+    with warmup.step("import_nlp_stack"):
+        _import_nlp_stack()
+    with warmup.step("nltk_data"):
+        _ensure_nltk_data()
+    with warmup.step("train_models"):
+        nlp_recommender = NLPDietRecommender()
+
+diet_warmup = Warmup("diet")
 
 @app.route('/diet/status')
 def diet_status():
     return jsonify({
         "status": "NLP Diet Server Running",
-        "meals_count": len(nlp_recommender.meal_data),
+        "ready": diet_warmup.ready,
+        "meals_count": len(nlp_recommender.meal_data) if nlp_recommender else None,
         "endpoints": [
             "/diet/recommend - POST - Get meal recommendations",
             "/diet/ingredients - POST - Get recipes by ingredients"
         ]
     })
 
-@app.route('/diet/recommend', methods=['POST'])
+@app.route('/diet/ready')
+def diet_ready():
+    return readiness_response(diet_warmup)
+
+@app.route('/diet/metrics')
+def diet_metrics():
+    return metrics.metrics_response()
+
+# GET takes the same parameters in the query string (ingredients and fields comma-separated),
+# so browsers can cache the result and revalidate it with If-None-Match
+@app.route('/diet/recommend', methods=['GET', 'POST'])
 def recommend_meals():
+    if not diet_warmup.wait():
+        return not_ready_response(diet_warmup)
     try:
-        data = request.get_json()
+        data = request_params(lists=('ingredients',))
+        if data is None:
+            return jsonify({"error": "Request body must be a JSON object"}), 400
         query = data.get('query', '')
         ingredients = data.get('ingredients', [])
         method = data.get('method', 'hybrid')
+        fields = parse_fields(data.get('fields'))
         
         if not query:
             return jsonify({"error": "Query is required"}), 400
@@ -222,38 +268,47 @@ def recommend_meals():
         else:  # hybrid
             recommendations = nlp_recommender.hybrid_recommendation(query, ingredients)
         
-        return jsonify({
+        return json_response({
             "success": True,
             "query": query,
             "method": method,
-            "recommendations": recommendations,
+            "recommendations": project_all(recommendations, fields),
             "count": len(recommendations)
         })
         
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
-@app.route('/diet/ingredients', methods=['POST'])
+@app.route('/diet/ingredients', methods=['GET', 'POST'])
 def recommend_by_ingredients():
+    if not diet_warmup.wait():
+        return not_ready_response(diet_warmup)
     try:
-        data = request.get_json()
+        data = request_params(lists=('ingredients',))
+        if data is None:
+            return jsonify({"error": "Request body must be a JSON object"}), 400
         ingredients = data.get('ingredients', [])
+        fields = parse_fields(data.get('fields'))
         
         if not ingredients:
             return jsonify({"error": "Ingredients list is required"}), 400
         
         recommendations = nlp_recommender.ingredient_based_recommendation(ingredients)
         
-        return jsonify({
+        return json_response({
             "success": True,
             "ingredients": ingredients,
-            "recommendations": recommendations,
+            "recommendations": project_all(recommendations, fields),
             "count": len(recommendations)
         })
         
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+# Warm up in the background once the routes are registered
+if serving_process(__name__):
+    diet_warmup.start(_warm_up)
+
 if __name__ == '__main__':
     print("🚀 Starting NLP Diet Recommendation Server on port 5002...")
     app.run(host='0.0.0.0', port=5002, debug=True)
\ No newline at end of file
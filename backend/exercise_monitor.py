@@ -0,0 +1,383 @@
+# backend/exercise_monitor.py
+"""Rep counting engine: joint angles, RepState machines and form feedback.
+
+Only depends on numpy, so it can run headless (benchmarks, replays,
+inference workers) without OpenCV or MediaPipe.
+"""
+import enum
+import time
+
+import numpy as np
+
+import metrics
+from joint_signals import OneEuroFilter, RepMetrics
+
+ANALYZE_SECONDS = metrics.histogram("exercise_analyze_seconds", "ExerciseMonitor.analyze per frame", ["exercise"])
+REPS = metrics.counter("exercise_reps", "Reps counted", ["exercise"])
+
+class PoseLandmark(enum.IntEnum):
+    """MediaPipe Pose landmark indices (mirrors mp.solutions.pose.PoseLandmark)"""
+    NOSE = 0
+    LEFT_EYE_INNER = 1
+    LEFT_EYE = 2
+    LEFT_EYE_OUTER = 3
+    RIGHT_EYE_INNER = 4
+    RIGHT_EYE = 5
+    RIGHT_EYE_OUTER = 6
+    LEFT_EAR = 7
+    RIGHT_EAR = 8
+    MOUTH_LEFT = 9
+    MOUTH_RIGHT = 10
+    LEFT_SHOULDER = 11
+    RIGHT_SHOULDER = 12
+    LEFT_ELBOW = 13
+    RIGHT_ELBOW = 14
+    LEFT_WRIST = 15
+    RIGHT_WRIST = 16
+    LEFT_PINKY = 17
+    RIGHT_PINKY = 18
+    LEFT_INDEX = 19
+    RIGHT_INDEX = 20
+    LEFT_THUMB = 21
+    RIGHT_THUMB = 22
+    LEFT_HIP = 23
+    RIGHT_HIP = 24
+    LEFT_KNEE = 25
+    RIGHT_KNEE = 26
+    LEFT_ANKLE = 27
+    RIGHT_ANKLE = 28
+    LEFT_HEEL = 29
+    RIGHT_HEEL = 30
+    LEFT_FOOT_INDEX = 31
+    RIGHT_FOOT_INDEX = 32
+
+# -------------------- Rep counting state --------------------
+class RepState:
+    MIN_PERIOD = 0.4  # Faster than this is treated as jitter, not a rep
+
+    def __init__(self, up_thresh, down_thresh, min_rep_interval=1.0):
+        self.up_thresh = up_thresh
+        self.down_thresh = down_thresh
+        self.stage = "down"  # Start in down position
+        self.count = 0
+        self.last_rep_time = None
+        self.min_rep_interval = min_rep_interval
+        self.rep_in_progress = False
+        self.last_transition_time = None
+        self.avg_period = None  # EMA of time between up transitions
+
+    def rep_interval(self):
+        # Follow the user's actual tempo so fast sets aren't undercounted,
+        # but never debounce harder than the configured interval
+        if self.avg_period is None:
+            return self.min_rep_interval
+        return min(self.min_rep_interval, max(self.MIN_PERIOD, 0.5 * self.avg_period))
+
+    def update(self, angle, now=None):
+        if now is None:
+            now = time.time()
+        counted = False
+        
+        # Check for transitions
+        if self.stage == "down" and angle < self.down_thresh:
+            # Still in down position
+            pass
+        elif self.stage == "down" and angle > self.up_thresh:
+            # Moved to up position - count a rep
+            if self.last_transition_time is not None:
+                period = now - self.last_transition_time
+                if period >= self.MIN_PERIOD:
+                    self.avg_period = period if self.avg_period is None else 0.7 * self.avg_period + 0.3 * period
+            self.last_transition_time = now
+            if self.last_rep_time is None or now - self.last_rep_time > self.rep_interval():
+                self.count += 1
+                self.last_rep_time = now
+                counted = True
+                print(f"REP COUNTED! Total: {self.count}")
+            self.stage = "up"
+        elif self.stage == "up" and angle < self.down_thresh:
+            # Moved back to down position
+            self.stage = "down"
+        
+        return counted
+
+# -------------------- Helper functions --------------------
+def angle_between(a, b, c):
+    a, b, c = np.array(a), np.array(b), np.array(c)
+    ba, bc = a - b, c - b
+    cosang = np.dot(ba, bc) / ((np.linalg.norm(ba) * np.linalg.norm(bc)) + 1e-8)
+    return np.degrees(np.arccos(np.clip(cosang, -1.0, 1.0)))
+
+def get_lm(landmarks, lm):
+    return (landmarks[lm].x, landmarks[lm].y)
+
+# -------------------- Exercise Monitor --------------------
+# (up threshold, down threshold, min rep interval) per exercise
+REP_THRESHOLDS = {
+    'bicep': (160, 60, 1.0),      # More lenient thresholds
+    'pushup': (160, 100, 1.2),    # Adjusted for pushup angles
+    'squat': (170, 90, 1.5),      # Squat has wider range
+    'lunge': (170, 80, 1.3),      # Lunge angles
+    'shoulder': (160, 80, 1.0),   # Shoulder press
+}
+
+# Degrees a complete rep covers. Every counted rep already spans its up/down
+# thresholds, so partial reps are judged against these instead
+FULL_RANGE_OF_MOTION = {
+    'bicep': 120,
+    'pushup': 75,
+    'squat': 95,
+    'lunge': 100,
+    'shoulder': 95,
+}
+
+class ExerciseMonitor:
+    def __init__(self):
+        self.states = {name: RepState(*params) for name, params in REP_THRESHOLDS.items()}
+        self.filters = {k: OneEuroFilter() for k in self.states}
+        self.metrics = {k: RepMetrics() for k in self.states}
+        self.current_data = {
+            'reps': 0,
+            'stage': None,
+            'feedback': [],
+            'symmetry': 0,
+            'angle': 0,
+            'velocity': 0,
+            'last_rep': None
+        }
+        self.last_count = 0  # Track last count to detect changes
+        self.frame_time = None
+
+    def analyze(self, name, lm, timestamp=None):
+        if name not in self.states:
+            return None
+        with ANALYZE_SECONDS.labels(name).time():
+            return self._analyze(name, lm, timestamp)
+
+    def _analyze(self, name, lm, timestamp):
+        # Frame time drives rep intervals, so replays at any speed count the same reps
+        self.frame_time = time.time() if timestamp is None else timestamp
+            
+        fn = getattr(self, f"analyze_{name}", None)
+        if fn:
+            angle, feedback, counted, reps, stage, symmetry = fn(lm)
+            
+            # Check if rep count changed
+            if reps > self.last_count:
+                counted = True
+                self.last_count = reps
+                print(f"REP DETECTED! New count: {reps}")
+            elif reps < self.last_count:
+                self.last_count = reps
+            
+            # Add rep completion feedback
+            if counted and reps > 0:
+                REPS.labels(name).inc()
+                feedback.append(f"Rep {reps} completed! 💪")
+                feedback.extend(self._tempo_feedback(name))
+            
+            self.current_data = {
+                'reps': reps,
+                'stage': stage,
+                'feedback': feedback,
+                'symmetry': symmetry,
+                'angle': angle,
+                'velocity': round(float(self.filters[name].velocity), 1),
+                'last_rep': self.metrics[name].last_rep
+            }
+            return self.current_data
+        return None
+
+    def _track(self, name, angle):
+        """Smooth the raw joint angle, advance the rep state machine and per-rep metrics"""
+        smoothed_angle = self.filters[name](angle, self.frame_time)
+        counted = self.states[name].update(smoothed_angle, self.frame_time)
+        self.metrics[name].update(smoothed_angle, self.filters[name].velocity, self.frame_time, counted)
+        return smoothed_angle, counted
+
+    def _tempo_feedback(self, name):
+        rep = self.metrics[name].last_rep
+        if not rep:
+            return []
+        feedback = []
+        if rep['tempo'] < 1.2:
+            feedback.append("Slow down, control the movement")
+        if rep['rom'] < FULL_RANGE_OF_MOTION[name]:
+            feedback.append("Use your full range of motion")
+        return feedback
+
+    def reset(self, name):
+        state = self.states[name]
+        state.count = 0
+        state.stage = "down"
+        state.last_rep_time = None
+        state.last_transition_time = None
+        state.avg_period = None
+        self.filters[name].reset()
+        self.metrics[name].reset()
+        self.current_data['reps'] = 0
+        self.current_data['stage'] = "down"
+        self.current_data['last_rep'] = None
+        self.last_count = 0
+
+    # --- BICEP CURLS ---
+    def analyze_bicep(self, lm):
+        try:
+            # Get landmarks for both arms
+            lsh = get_lm(lm, PoseLandmark.LEFT_SHOULDER)
+            lel = get_lm(lm, PoseLandmark.LEFT_ELBOW)
+            lwr = get_lm(lm, PoseLandmark.LEFT_WRIST)
+            
+            rsh = get_lm(lm, PoseLandmark.RIGHT_SHOULDER)
+            rel = get_lm(lm, PoseLandmark.RIGHT_ELBOW)
+            rwr = get_lm(lm, PoseLandmark.RIGHT_WRIST)
+            
+            # Calculate angles
+            left_angle = angle_between(lsh, lel, lwr)
+            right_angle = angle_between(rsh, rel, rwr)
+            
+            # Use the smaller angle (more curled arm) for rep counting
+            current_angle = min(left_angle, right_angle)
+            
+            # Smooth and update rep counter
+            smoothed_angle, counted = self._track('bicep', current_angle)
+            
+            feedback = []
+            symmetry_diff = abs(left_angle - right_angle)
+            
+            # Form feedback
+            if smoothed_angle > 150:
+                feedback.append("Extend arms fully")
+            elif smoothed_angle < 60:
+                feedback.append("Good contraction!")
+            
+            if symmetry_diff > 25:
+                feedback.append("Keep arms symmetrical")
+                
+            if self.states['bicep'].stage == "up" and smoothed_angle < 140:
+                feedback.append("Lift higher")
+            elif self.states['bicep'].stage == "down" and smoothed_angle > 80:
+                feedback.append("Lower completely")
+                
+            return smoothed_angle, feedback, counted, self.states['bicep'].count, self.states['bicep'].stage, symmetry_diff
+            
+        except Exception as e:
+            print(f"Bicep analysis error: {e}")
+            return 0, ["Adjust position"], False, self.states['bicep'].count, "ready", 0
+
+    # --- PUSH-UPS ---
+    def analyze_pushup(self, lm):
+        try:
+            lsh, lel, lwr = get_lm(lm, PoseLandmark.LEFT_SHOULDER), get_lm(lm, PoseLandmark.LEFT_ELBOW), get_lm(lm, PoseLandmark.LEFT_WRIST)
+            rsh, rel, rwr = get_lm(lm, PoseLandmark.RIGHT_SHOULDER), get_lm(lm, PoseLandmark.RIGHT_ELBOW), get_lm(lm, PoseLandmark.RIGHT_WRIST)
+            
+            left_angle = angle_between(lsh, lel, lwr)
+            right_angle = angle_between(rsh, rel, rwr)
+            current_angle = (left_angle + right_angle) / 2
+            
+            smoothed_angle, counted = self._track('pushup', current_angle)
+            
+            feedback = []
+            symmetry_diff = abs(left_angle - right_angle)
+            
+            if smoothed_angle > 150:
+                feedback.append("Arms straight")
+            elif smoothed_angle < 100:
+                feedback.append("Good depth!")
+                
+            if symmetry_diff > 20:
+                feedback.append("Balance both sides")
+                
+            return smoothed_angle, feedback, counted, self.states['pushup'].count, self.states['pushup'].stage, symmetry_diff
+            
+        except Exception as e:
+            print(f"Pushup analysis error: {e}")
+            return 0, ["Adjust position"], False, self.states['pushup'].count, "ready", 0
+
+    # --- SQUATS ---
+    def analyze_squat(self, lm):
+        try:
+            lhip, lk, la = get_lm(lm, PoseLandmark.LEFT_HIP), get_lm(lm, PoseLandmark.LEFT_KNEE), get_lm(lm, PoseLandmark.LEFT_ANKLE)
+            rhip, rk, ra = get_lm(lm, PoseLandmark.RIGHT_HIP), get_lm(lm, PoseLandmark.RIGHT_KNEE), get_lm(lm, PoseLandmark.RIGHT_ANKLE)
+            
+            left_angle = angle_between(lhip, lk, la)
+            right_angle = angle_between(rhip, rk, ra)
+            current_angle = (left_angle + right_angle) / 2
+            
+            smoothed_angle, counted = self._track('squat', current_angle)
+            
+            feedback = []
+            symmetry_diff = abs(left_angle - right_angle)
+            
+            if smoothed_angle > 160:
+                feedback.append("Stand tall")
+            elif smoothed_angle < 90:
+                feedback.append("Excellent depth! 🔥")
+                
+            if symmetry_diff > 15:
+                feedback.append("Even weight distribution")
+                
+            return smoothed_angle, feedback, counted, self.states['squat'].count, self.states['squat'].stage, symmetry_diff
+            
+        except Exception as e:
+            print(f"Squat analysis error: {e}")
+            return 0, ["Adjust position"], False, self.states['squat'].count, "ready", 0
+
+    # --- LUNGES ---
+    def analyze_lunge(self, lm):
+        try:
+            lhip, lk, la = get_lm(lm, PoseLandmark.LEFT_HIP), get_lm(lm, PoseLandmark.LEFT_KNEE), get_lm(lm, PoseLandmark.LEFT_ANKLE)
+            rhip, rk, ra = get_lm(lm, PoseLandmark.RIGHT_HIP), get_lm(lm, PoseLandmark.RIGHT_KNEE), get_lm(lm, PoseLandmark.RIGHT_ANKLE)
+            
+            left_angle = angle_between(lhip, lk, la)
+            right_angle = angle_between(rhip, rk, ra)
+            current_angle = min(left_angle, right_angle)  # Use the more bent knee
+            
+            smoothed_angle, counted = self._track('lunge', current_angle)
+            
+            feedback = []
+            symmetry_diff = abs(left_angle - right_angle)
+            
+            if smoothed_angle < 80:
+                feedback.append("Perfect lunge! 🎯")
+            elif smoothed_angle < 110:
+                feedback.append("Good form")
+                
+            if symmetry_diff > 25:
+                feedback.append("Alternate legs evenly")
+                
+            return smoothed_angle, feedback, counted, self.states['lunge'].count, self.states['lunge'].stage, symmetry_diff
+            
+        except Exception as e:
+            print(f"Lunge analysis error: {e}")
+            return 0, ["Adjust position"], False, self.states['lunge'].count, "ready", 0
+
+    # --- SHOULDER PRESS ---
+    def analyze_shoulder(self, lm):
+        try:
+            lsh, lel, lwr = get_lm(lm, PoseLandmark.LEFT_SHOULDER), get_lm(lm, PoseLandmark.LEFT_ELBOW), get_lm(lm, PoseLandmark.LEFT_WRIST)
+            rsh, rel, rwr = get_lm(lm, PoseLandmark.RIGHT_SHOULDER), get_lm(lm, PoseLandmark.RIGHT_ELBOW), get_lm(lm, PoseLandmark.RIGHT_WRIST)
+            
+            # Vertical movement angles
+            left_angle = angle_between(lel, lsh, (lsh[0], lsh[1] - 0.3))
+            right_angle = angle_between(rel, rsh, (rsh[0], rsh[1] - 0.3))
+            current_angle = (left_angle + right_angle) / 2
+            
+            smoothed_angle, counted = self._track('shoulder', current_angle)
+            
+            feedback = []
+            symmetry_diff = abs(left_angle - right_angle)
+            
+            if smoothed_angle > 150:
+                feedback.append("Arms fully extended! 👍")
+            elif smoothed_angle < 80:
+                feedback.append("Good press form")
+                
+            if symmetry_diff > 20:
+                feedback.append("Press evenly")
+                
+            return smoothed_angle, feedback, counted, self.states['shoulder'].count, self.states['shoulder'].stage, symmetry_diff
+            
+        except Exception as e:
+            print(f"Shoulder analysis error: {e}")
+            return 0, ["Adjust position"], False, self.states['shoulder'].count, "ready", 0
@@ -0,0 +1,212 @@
+# backend/gateway.py
+"""Single ASGI application serving the exercise, diet and nutrition APIs.
+
+The three Flask apps keep their routes unchanged and are mounted behind one
+WSGI dispatcher (run on a thread pool), so the frontend can use one origin
+and the services share one process, one CORS policy and the same caches
+(e.g. the nutrition lookup cache). The I/O-bound nutrition lookups are
+served by native async handlers instead, so a slow upstream API no longer
+ties up a thread, and a meal's foods are looked up concurrently.
+
+    cd backend
+    python gateway.py                       # uvicorn on :8000
+    gunicorn gateway:app -k uvicorn.workers.UvicornWorker -b 0.0.0.0:8000 \\
+        --workers 1 --graceful-timeout 10
+
+Keep one worker process: rep counters, the webcam and the inference farm
+are per-process state. Scale pose inference with INFERENCE_WORKERS (see
+inference_farm.py) and request concurrency with GATEWAY_THREADS.
+"""
+import asyncio
+import contextlib
+import os
+
+import anyio
+import httpx
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from werkzeug.datastructures import MultiDict
+
+import diet_server
+import nutrition_server
+import server
+from db import mongo
+from serialization import encode, parse_fields, project, project_all, query_params
+
+
+class PrefixDispatcher:
+    """Route WSGI requests to an app by path prefix, leaving PATH_INFO untouched
+    (the Flask apps already register their full /diet/... and /nutrition/... paths)"""
+
+    def __init__(self, default, prefixes):
+        self.default = default
+        self.prefixes = prefixes
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        for prefix, app in self.prefixes:
+            if path == prefix or path.startswith(prefix + '/'):
+                return app(environ, start_response)
+        return self.default(environ, start_response)
+
+
+wsgi_app = PrefixDispatcher(server.app, [
+    ('/diet', diet_server.app),
+    ('/nutrition', nutrition_server.app),
+])
+
+tracker = nutrition_server.nutrition_tracker
+
+
+# -------------------- Async nutrition routes --------------------
+async def _params(request, lists=()):
+    """Query string for GET, JSON body for POST (as serialization.request_params does
+    on the Flask side); None when the body is JSON but not an object"""
+    if request.method != 'POST':
+        return query_params(request.query_params, lists)
+    try:
+        data = await request.json()
+    except ValueError:
+        return {}
+    if data is None:
+        return {}
+    return data if isinstance(data, dict) else None
+
+
+def _not_an_object():
+    return JSONResponse({"error": "Request body must be a JSON object"}, 400)
+
+
+def _json_response(request, payload, status=200):
+    status, body, headers = encode(payload, status, request.method,
+                                   request.headers.get('accept-encoding'),
+                                   request.headers.get('if-none-match'))
+    return Response(body, status, headers)
+
+
+async def nutrition_search(request):
+    try:
+        data = await _params(request)
+        if data is None:
+            return _not_an_object()
+        query = data.get('query', '').strip()
+        fields = parse_fields(data.get('fields'))
+
+        if not query:
+            return JSONResponse({"error": "Food query is required"}, 400)
+
+        result = await tracker.search_food_async(query, request.app.state.http)
+
+        if result:
+            return _json_response(request, {
+                "success": True,
+                "query": query,
+                "nutrition": project(result, fields)
+            })
+        return JSONResponse({
+            "success": False,
+            "error": f"Could not find nutrition data for '{query}'"
+        }, 404)
+
+    except Exception as e:
+        return JSONResponse({"success": False, "error": str(e)}, 500)
+
+
+async def nutrition_analyze_meal(request):
+    try:
+        data = await _params(request, lists=('food_items',))
+        if data is None:
+            return _not_an_object()
+        food_items = data.get('food_items', [])
+        fields = parse_fields(data.get('fields'))
+
+        if not food_items:
+            return JSONResponse({"error": "Food items list is required"}, 400)
+
+        analysis = await tracker.analyze_meal_async(food_items, request.app.state.http)
+        analysis['foods'] = project_all(analysis['foods'], fields)
+
+        return _json_response(request, {
+            "success": True,
+            "food_count": len(food_items),
+            "total_nutrition": analysis
+        })
+
+    except Exception as e:
+        return JSONResponse({"success": False, "error": str(e)}, 500)
+
+
+# -------------------- MJPEG stream --------------------
+# Served natively rather than through the WSGI mount: a2wsgi never closes a
+# streaming response's iterator when the client goes away, which would leave
+# the webcam open, inference running and a GATEWAY_THREADS worker taken for
+# every closed tab.
+async def _until_disconnect(request, frames):
+    try:
+        while not await request.is_disconnected():
+            # Not abandoned on cancel, so the generator is idle by the time it's closed
+            chunk = await anyio.to_thread.run_sync(next, frames, None)
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        with anyio.CancelScope(shield=True):
+            # Runs the generator's cleanup (camera release, landmarker close)
+            await anyio.to_thread.run_sync(frames.close)
+
+
+async def video_feed(request):
+    # Starting the farm for a ?source= stream spawns processes; keep it off the loop
+    stream, error = await asyncio.to_thread(server.video_stream, MultiDict(request.query_params.multi_items()))
+    if error:
+        body, status = error
+        return JSONResponse(body, status)
+    return StreamingResponse(_until_disconnect(request, stream), media_type=server.MJPEG)
+
+
+# -------------------- App --------------------
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    app.state.http = httpx.AsyncClient(limits=httpx.Limits(max_connections=100, max_keepalive_connections=20))
+    try:
+        yield
+    finally:
+        # Runs after uvicorn has drained (or timed out) open connections
+        await app.state.http.aclose()
+        if server._farm is not None:
+            # Joins worker processes and threads (seconds); keep the event loop free meanwhile
+            await asyncio.to_thread(server._farm.stop)
+        mongo.close()
+
+
+app = Starlette(
+    routes=[
+        Route('/nutrition/search', nutrition_search, methods=['GET', 'POST']),
+        Route('/nutrition/analyze-meal', nutrition_analyze_meal, methods=['GET', 'POST']),
+        Route('/video_feed', video_feed, methods=['GET']),
+        # Everything else goes to the Flask apps
+        Mount('/', app=WSGIMiddleware(wsgi_app, workers=int(os.getenv("GATEWAY_THREADS", "32")))),
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*']),
+    ],
+    lifespan=lifespan,
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print("🚀 Starting unified API gateway on port 8000...")
+    uvicorn.run(
+        "gateway:app",
+        host=os.getenv("GATEWAY_HOST", "0.0.0.0"),
+        port=int(os.getenv("GATEWAY_PORT", "8000")),
+        workers=int(os.getenv("GATEWAY_WORKERS", "1")),
+        timeout_graceful_shutdown=int(os.getenv("GATEWAY_GRACEFUL_TIMEOUT", "10")),
+        log_level="info",
+    )
@@ -0,0 +1,580 @@
+# backend/inference_farm.py
+"""Multi-source pose inference sharded across worker processes.
+
+Each video source (device index, video file, or RTSP/HTTP stream URL) gets
+a capture thread in the server process and is assigned to one inference
+worker process. Frames travel through per-source shared-memory rings, so
+only tiny (source, slot, timestamp) messages are pickled:
+
+    capture thread -> input ring slot -> worker (pose + analyze + JPEG)
+                   -> output ring slot -> collector thread -> /video_feed
+
+A source never has more frames in flight than its ring has slots; when the
+worker falls behind, new frames are dropped instead of queueing latency.
+The scheduler places sources on the least-loaded worker (measured
+inference seconds per second of wall time) and can rebalance them.
+
+Any MJPEG endpoint works as a local stand-in for a network camera, e.g.
+another instance of this server's /video_feed.
+
+    cd backend
+    python -m inference_farm --sources 0,clip.mp4,rtsp://localhost:8554/cam --workers 4
+"""
+import argparse
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import metrics
+from warmup import WORKER_ENV
+
+FRAME_SHAPE = (480, 640, 3)
+WORKER_CHECK_SECONDS = 1.0  # how often the collector looks for workers that died
+
+# Spawning briefly marks os.environ so the children skip the server warm-up
+_spawn_lock = threading.Lock()
+
+# Workers record their per-stage metrics in their own process; the server side
+# sees the whole-frame time each worker reports back, and capture-side drops
+FRAME_SECONDS = metrics.histogram("inference_farm_frame_seconds", "Worker time per frame (pose, analyze, JPEG)", ["worker"])
+DROPPED_FRAMES = metrics.counter("inference_farm_dropped_frames", "Captured frames dropped because the worker was behind")
+
+
+def parse_source(spec):
+    """'0' -> camera index 0; anything else is passed to cv2.VideoCapture as a path/URL"""
+    spec = str(spec).strip()
+    return int(spec) if spec.isdigit() else spec
+
+
+class FrameRing:
+    """Fixed number of equally sized byte slots in one shared-memory block"""
+
+    def __init__(self, slots, slot_bytes, name=None):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.buf = np.ndarray((slots, slot_bytes), dtype=np.uint8, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def frame(self, slot, shape):
+        return self.buf[slot].reshape(shape)
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# -------------------- Worker process --------------------
+class _WorkerSource:
+    def __init__(self, msg):
+        from exercise_monitor import ExerciseMonitor
+        from pose_pipeline import create_pose
+
+        _, self.id, in_name, out_name, self.shape, slots, self.exercise, self.flip = msg
+        self.frames = FrameRing(slots, int(np.prod(self.shape)), in_name)
+        self.jpegs = FrameRing(slots, int(np.prod(self.shape)), out_name)
+        self.pose = create_pose()
+        self.monitor = ExerciseMonitor()
+
+    def close(self):
+        self.pose.close()
+        self.frames.close()
+        self.jpegs.close()
+
+
+def _process(source, slot, timestamp, jpeg_quality):
+    # Kept in its own function so no view into shared memory outlives the call
+    # (a live view would make closing the ring on detach fail)
+    from pose_pipeline import encode_jpeg, process_frame
+
+    frame = source.frames.frame(slot, source.shape)
+    image, _, data = process_frame(source.pose, source.monitor, frame, source.exercise, timestamp, source.flip)
+    buffer = encode_jpeg(image, jpeg_quality)
+    if buffer is None or buffer.size > source.jpegs.slot_bytes:
+        return 0, data
+    source.jpegs.buf[slot, :buffer.size] = buffer.ravel()
+    return buffer.size, data
+
+
+def _worker_main(worker_id, tasks, results, jpeg_quality):
+    sources = {}
+    while True:
+        msg = tasks.get()
+        kind = msg[0]
+        if kind == 'stop':
+            break
+        # One bad attach or frame must not take the worker (and every source on it) down
+        try:
+            _handle(worker_id, msg, sources, results, jpeg_quality)
+        except Exception as e:
+            print(f"Worker {worker_id} error on {kind}: {e}")
+            if kind == 'attach':
+                results.put(('error', worker_id, msg[1], f"Worker could not attach: {e}"))
+            elif kind == 'frame':
+                # Always hand the slot back, or the source stalls once its ring is used up
+                results.put(('frame', worker_id, msg[1], msg[2], 0, None, 0.0))
+
+    for source in sources.values():
+        source.close()
+
+
+def _handle(worker_id, msg, sources, results, jpeg_quality):
+    kind = msg[0]
+    if kind == 'attach':
+        source = _WorkerSource(msg)
+        sources[source.id] = source
+    elif kind == 'detach':
+        source = sources.pop(msg[1], None)
+        if source:
+            source.close()
+    elif kind == 'exercise':
+        if msg[1] in sources:
+            sources[msg[1]].exercise = msg[2]
+    elif kind == 'reset':
+        if msg[1] in sources and msg[2] in sources[msg[1]].monitor.states:
+            sources[msg[1]].monitor.reset(msg[2])
+    elif kind == 'frame':
+        _, source_id, slot, timestamp = msg
+        source = sources.get(source_id)
+        if source is None:
+            # Detached (or never attached) while the frame was queued; just hand the slot back
+            results.put(('frame', worker_id, source_id, slot, 0, None, 0.0))
+            return
+
+        start = time.perf_counter()
+        size, data = _process(source, slot, timestamp, jpeg_quality)
+        results.put(('frame', worker_id, source_id, slot, size, data, time.perf_counter() - start))
+
+
+# -------------------- Server-side bookkeeping --------------------
+class _Source:
+    def __init__(self, source_id, spec, exercise, shape, slots, flip):
+        self.id = source_id
+        self.spec = spec
+        self.exercise = exercise
+        self.flip = flip
+        self.shape = shape
+        self.frames = FrameRing(slots, int(np.prod(shape)))
+        self.jpegs = FrameRing(slots, int(np.prod(shape)))
+        self.free_slots = queue.Queue()
+        for i in range(slots):
+            self.free_slots.put(i)
+        self.in_flight = set()  # slots handed to a worker and not yet returned
+        self.worker = None
+        self.stop = threading.Event()
+        self.thread = None
+        self._closed = False
+        self._close_lock = threading.Lock()
+
+        self.cond = threading.Condition()
+        self.seq = 0
+        self.jpeg = None
+        self.data = None
+        self.captured = 0
+        self.processed = 0
+        self.dropped = 0
+        self.cost = 0.0  # EMA of inference seconds per frame
+        self.error = None
+
+    def load(self, window):
+        """Estimated worker seconds per wall second this source needs (at its capture rate,
+        so a starved source still shows its real demand)"""
+        return self.cost * (self.captured / window if window else 0)
+
+    def close(self):
+        # Called by remove_source or, if it gave up waiting, by the exiting capture thread
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        self.frames.close()
+        self.jpegs.close()
+
+
+class _Worker:
+    def __init__(self, worker_id, ctx, jpeg_quality):
+        self.id = worker_id
+        self.tasks = ctx.Queue()
+        self.sources = set()
+        self.busy = 0.0
+        self.frames = 0
+        self.process = None
+        self.dead = False
+        self.jpeg_quality = jpeg_quality
+
+    def start(self, ctx, results):
+        self.process = ctx.Process(target=_worker_main, args=(self.id, self.tasks, results, self.jpeg_quality),
+                                   name=f"pose-worker-{self.id}", daemon=True)
+        # The child re-imports the server modules before _worker_main runs, so the
+        # marker has to be in the environment it inherits
+        with _spawn_lock:
+            os.environ[WORKER_ENV] = "1"
+            try:
+                self.process.start()
+            finally:
+                del os.environ[WORKER_ENV]
+
+
+class InferenceFarm:
+    def __init__(self, workers=None, frame_shape=FRAME_SHAPE, slots=3, jpeg_quality=80):
+        self.ctx = mp.get_context("spawn")  # Never fork a process that already runs capture threads
+        self.frame_shape = tuple(frame_shape)
+        self.slots = slots
+        self.results = self.ctx.Queue()
+        self.workers = [_Worker(i, self.ctx, jpeg_quality) for i in range(workers or os.cpu_count() or 1)]
+        self.sources = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._running = False
+        self._collector = None
+        self._window_start = time.monotonic()
+
+    # --- lifecycle ---
+    def start(self):
+        if self._running:
+            return self
+        for worker in self.workers:
+            worker.start(self.ctx, self.results)
+        self._running = True
+        self._collector = threading.Thread(target=self._collect, name="farm-collector", daemon=True)
+        self._collector.start()
+        return self
+
+    def stop(self):
+        if not self._running:
+            return
+        for source_id in list(self.sources):
+            self.remove_source(source_id)
+        for worker in self.workers:
+            worker.tasks.put(('stop',))
+        for worker in self.workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        self._running = False
+        self.results.put(None)
+        self._collector.join(timeout=2)
+
+    # --- sources ---
+    def add_source(self, spec, exercise="bicep", flip=None):
+        """Start capturing `spec` and assign it to the least-loaded worker; returns its id"""
+        spec = parse_source(spec)
+        if flip is None:
+            flip = isinstance(spec, int)  # Mirror webcams like the single-camera stream does
+        with self._lock:
+            source = _Source(str(next(self._ids)), spec, exercise, self.frame_shape, self.slots, flip)
+            self.sources[source.id] = source
+            self._assign(source, self._least_loaded())
+        source.thread = threading.Thread(target=self._run_capture, args=(source,),
+                                         name=f"farm-capture-{source.id}", daemon=True)
+        source.thread.start()
+        return source.id
+
+    def remove_source(self, source_id):
+        with self._lock:
+            source = self.sources.pop(source_id, None)
+            if source is None:
+                return False
+            source.stop.set()
+            self._unassign(source)
+        source.thread.join(timeout=2)
+        if not source.thread.is_alive():
+            source.close()
+        # else: still blocked in cap.read() (slow network streams); it closes the rings on exit
+        with source.cond:
+            source.cond.notify_all()
+        return True
+
+    def set_exercise(self, source_id, exercise):
+        source = self.sources[source_id]
+        source.exercise = exercise
+        source.worker.tasks.put(('exercise', source_id, exercise))
+
+    def reset(self, source_id, exercise):
+        source = self.sources[source_id]
+        source.worker.tasks.put(('reset', source_id, exercise))
+
+    def data(self, source_id):
+        return self.sources[source_id].data
+
+    def frames(self, source_id):
+        """Yield each new annotated JPEG for a source (blocks between frames)"""
+        source = self.sources[source_id]
+        seen = -1
+        while not source.stop.is_set():
+            with source.cond:
+                source.cond.wait_for(lambda: source.seq != seen or source.stop.is_set(), timeout=1.0)
+                if source.seq == seen:
+                    continue
+                seen, jpeg = source.seq, source.jpeg
+            yield jpeg
+
+    # --- scheduling ---
+    def _assign(self, source, worker):
+        source.worker = worker
+        worker.sources.add(source.id)
+        worker.tasks.put(('attach', source.id, source.frames.name, source.jpegs.name,
+                          source.shape, self.slots, source.exercise, source.flip))
+
+    def _unassign(self, source):
+        source.worker.tasks.put(('detach', source.id))
+        source.worker.sources.discard(source.id)
+
+    def _worker_load(self, worker, window):
+        return sum(self.sources[s].load(window) for s in worker.sources if s in self.sources)
+
+    def _live_workers(self):
+        return [w for w in self.workers if not w.dead] or self.workers
+
+    def _least_loaded(self):
+        window = time.monotonic() - self._window_start
+        # Measured load first, number of sources as the tie-breaker before anything is measured
+        return min(self._live_workers(), key=lambda w: (self._worker_load(w, window), len(w.sources)))
+
+    def rebalance(self, threshold=0.25):
+        """Move one source from the busiest to the idlest worker if that narrows the gap.
+
+        Moving a source restarts its pose tracker and rep counters on the new
+        worker, so only rebalance when the imbalance is worth it.
+        """
+        with self._lock:
+            window = time.monotonic() - self._window_start
+            workers = self._live_workers()
+            loads = {w.id: self._worker_load(w, window) for w in workers}
+            busiest = max(workers, key=lambda w: loads[w.id])
+            idlest = min(workers, key=lambda w: loads[w.id])
+            gap = loads[busiest.id] - loads[idlest.id]
+            if gap < threshold or len(busiest.sources) < 2:
+                return None
+
+            candidates = [self.sources[s] for s in busiest.sources if s in self.sources]
+            source = min(candidates, key=lambda s: abs(gap / 2 - s.load(window)))
+            if source.load(window) >= gap:
+                return None
+            self._unassign(source)
+            self._assign(source, idlest)
+            return source.id
+
+    # --- threads ---
+    def _run_capture(self, source):
+        try:
+            self._capture(source)
+        finally:
+            if source.stop.is_set():
+                source.close()
+
+    def _capture(self, source):
+        import cv2
+
+        cap = cv2.VideoCapture(source.spec)
+        if not cap.isOpened():
+            source.error = f"Could not open source {source.spec!r}"
+            print(f"Error: {source.error}")
+            return
+
+        height, width = source.shape[:2]
+        is_file = isinstance(source.spec, str) and os.path.isfile(source.spec)
+        frame_interval = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or 30.0) if is_file else 0.0
+        next_frame = time.monotonic()
+
+        try:
+            while not source.stop.is_set():
+                success, frame = cap.read()
+                if source.stop.is_set():
+                    break  # Removed while the read blocked
+                if not success:
+                    if is_file:
+                        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)  # Loop files so they behave like live feeds
+                        continue
+                    source.error = "Stream ended"
+                    break
+                source.captured += 1
+
+                if frame_interval:
+                    # Pace files at their native frame rate
+                    next_frame += frame_interval
+                    delay = next_frame - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                try:
+                    slot = source.free_slots.get_nowait()
+                except queue.Empty:
+                    source.dropped += 1  # Worker is behind; drop rather than queue latency
+                    DROPPED_FRAMES.inc()
+                    continue
+
+                target = source.frames.frame(slot, source.shape)
+                if frame.shape == target.shape:
+                    np.copyto(target, frame)
+                else:
+                    cv2.resize(frame, (width, height), dst=target)
+                source.in_flight.add(slot)
+                source.worker.tasks.put(('frame', source.id, slot, time.time()))
+        finally:
+            cap.release()
+
+    def _collect(self):
+        last_check = time.monotonic()
+        while True:
+            try:
+                msg = self.results.get(timeout=WORKER_CHECK_SECONDS)
+            except queue.Empty:
+                msg = False
+            if msg is None:
+                break
+            # Whatever goes wrong with one message, keep collecting for every other source
+            try:
+                if msg:
+                    self._result(msg)
+                if time.monotonic() - last_check >= WORKER_CHECK_SECONDS:
+                    last_check = time.monotonic()
+                    self._recover_dead_workers()
+            except Exception as e:
+                print(f"Farm collector error: {e}")
+
+    def _result(self, msg):
+        if msg[0] == 'error':
+            _, _, source_id, error = msg
+            source = self.sources.get(source_id)
+            if source is not None:
+                source.error = error
+            return
+
+        _, worker_id, source_id, slot, size, data, busy = msg
+        worker = self.workers[worker_id]
+        if worker.dead:
+            return  # Its sources' slots were reclaimed when it was found dead
+        FRAME_SECONDS.labels(worker_id).observe(busy)
+        worker.busy += busy
+        worker.frames += 1
+
+        with self._lock:
+            # remove_source pops the source under this lock before closing its rings,
+            # so the ring can't go away while it is read here
+            source = self.sources.get(source_id)
+            if source is None:
+                return
+            jpeg = bytes(source.jpegs.buf[slot, :size]) if size else None
+        if slot in source.in_flight:
+            source.in_flight.discard(slot)
+            source.free_slots.put(slot)
+        source.processed += 1
+        source.cost = busy if source.cost == 0 else 0.9 * source.cost + 0.1 * busy
+        with source.cond:
+            if jpeg is not None:
+                source.jpeg = jpeg
+                source.seq += 1
+            if data is not None:
+                source.data = data
+            source.cond.notify_all()
+
+    def _recover_dead_workers(self):
+        """Move the sources of workers that exited unexpectedly to the remaining ones"""
+        if not self._running:
+            return
+        for worker in self.workers:
+            if worker.dead or worker.process is None or worker.process.is_alive():
+                continue
+            worker.dead = True
+            print(f"Warning: inference worker {worker.id} died (exit code {worker.process.exitcode}), "
+                  f"moving {len(worker.sources)} source(s)")
+            with self._lock:
+                for source_id in list(worker.sources):
+                    worker.sources.discard(source_id)
+                    source = self.sources.get(source_id)
+                    if source is None:
+                        continue
+                    if all(w.dead for w in self.workers):
+                        source.error = "No inference workers left"
+                        continue
+                    self._assign(source, self._least_loaded())
+                    # Frames the dead worker held are never coming back
+                    for slot in list(source.in_flight):
+                        source.in_flight.discard(slot)
+                        source.free_slots.put(slot)
+
+    # --- reporting ---
+    def stats(self, reset=False):
+        """Per-worker utilisation and per-source throughput since the last reset"""
+        now = time.monotonic()
+        window = max(now - self._window_start, 1e-9)
+        # Request threads add and remove sources (and move them between workers)
+        # concurrently, so report from a snapshot
+        with self._lock:
+            worker_sources = [sorted(w.sources) for w in self.workers]
+            sources = list(self.sources.values())
+        report = {
+            'window_seconds': round(window, 2),
+            'workers': [{
+                'id': w.id,
+                'alive': bool(w.process and w.process.is_alive()),
+                'sources': ids,
+                'utilisation': round(w.busy / window, 3),
+                'fps': round(w.frames / window, 1),
+            } for w, ids in zip(self.workers, worker_sources)],
+            'sources': [{
+                'id': s.id,
+                'spec': str(s.spec),
+                'exercise': s.exercise,
+                'worker': s.worker.id if s.worker else None,
+                'capture_fps': round(s.captured / window, 1),
+                'processed_fps': round(s.processed / window, 1),
+                'dropped': s.dropped,
+                'ms_per_frame': round(s.cost * 1000, 1),
+                'error': s.error,
+            } for s in sources],
+        }
+        if reset:
+            self._window_start = now
+            for w in self.workers:
+                w.busy, w.frames = 0.0, 0
+            for s in sources:
+                s.captured = s.processed = s.dropped = 0
+        return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sources", required=True, help="comma-separated device indices, files or stream URLs")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--exercise", default="squat")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between utilisation reports")
+    args = parser.parse_args(argv)
+
+    farm = InferenceFarm(workers=args.workers).start()
+    try:
+        for spec in args.sources.split(","):
+            farm.add_source(spec, args.exercise)
+        deadline = time.monotonic() + args.duration
+        while time.monotonic() < deadline:
+            time.sleep(args.interval)
+            report = farm.stats(reset=True)
+            workers = "  ".join(f"w{w['id']}={w['utilisation']:.0%}/{w['fps']}fps" for w in report['workers'])
+            sources = "  ".join(f"s{s['id']}={s['processed_fps']}fps(-{s['dropped']})" for s in report['sources'])
+            print(f"{workers} | {sources}")
+            moved = farm.rebalance()
+            if moved is not None:
+                print(f"rebalanced source {moved}")
+    finally:
+        farm.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# backend/joint_signals.py
+"""Streaming per-joint signal processing.
+
+Everything here is updated once per frame in O(1) time and fixed memory,
+and is keyed on frame timestamps rather than frame counts, so replays and
+dropped frames behave the same as a live camera.
+"""
+import math
+
+
+class LowPass:
+    def __init__(self):
+        self.value = None
+
+    def __call__(self, x, alpha):
+        self.value = x if self.value is None else alpha * x + (1 - alpha) * self.value
+        return self.value
+
+
+def _alpha(cutoff, dt):
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter:
+    """One Euro filter (Casiez et al., 2012): adaptive low-pass that smooths
+    heavily when the joint is still and follows quickly when it moves"""
+
+    MIN_CUTOFF = 1.5
+    BETA = 0.02
+    D_CUTOFF = 1.0
+
+    def __init__(self, min_cutoff=MIN_CUTOFF, beta=BETA, d_cutoff=D_CUTOFF):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self._x = LowPass()
+        self._dx = LowPass()
+        self._t = None
+        self.velocity = 0.0  # filtered derivative, units per second
+
+    def __call__(self, x, t):
+        if self._t is None:
+            self._t = t
+            return self._x(x, 1.0)
+        dt = t - self._t
+        if dt <= 0:
+            # Duplicate/out-of-order timestamp: keep the current estimate
+            return self._x.value
+        self._t = t
+
+        raw_dx = (x - self._x.value) / dt
+        self.velocity = self._dx(raw_dx, _alpha(self.d_cutoff, dt))
+        cutoff = self.min_cutoff + self.beta * abs(self.velocity)
+        return self._x(x, _alpha(cutoff, dt))
+
+    def reset(self):
+        self._x = LowPass()
+        self._dx = LowPass()
+        self._t = None
+        self.velocity = 0.0
+
+
+class RepMetrics:
+    """Per-rep tempo, range of motion and time under tension.
+
+    A rep runs from one counted transition to the next; the finished rep's
+    numbers are published in `last_rep` when the next one is counted.
+    """
+
+    MOVING_VELOCITY = 15.0
+
+    def __init__(self, moving_velocity=MOVING_VELOCITY):
+        self.moving_velocity = moving_velocity  # deg/s above which the joint counts as under tension
+        self.last_rep = None
+        self._last_t = None
+        self._reset(None, None)
+
+    def _reset(self, angle, t):
+        self._rep_start = t
+        self._low = self._high = angle
+        self._tut = 0.0
+        self._peak_velocity = 0.0
+
+    def update(self, angle, velocity, t, counted):
+        if self._last_t is not None and t > self._last_t and abs(velocity) > self.moving_velocity:
+            self._tut += t - self._last_t
+        self._last_t = t
+
+        if self._low is None:
+            self._low = self._high = angle
+        else:
+            self._low = min(self._low, angle)
+            self._high = max(self._high, angle)
+        self._peak_velocity = max(self._peak_velocity, abs(velocity))
+
+        if counted:
+            if self._rep_start is not None:
+                self.last_rep = {
+                    'tempo': round(float(t - self._rep_start), 2),
+                    'rom': round(float(self._high - self._low), 1),
+                    'time_under_tension': round(float(self._tut), 2),
+                    'peak_velocity': round(float(self._peak_velocity), 1),
+                }
+            self._reset(angle, t)
+
+    def reset(self):
+        self.last_rep = None
+        self._last_t = None
+        self._reset(None, None)
@@ -0,0 +1,235 @@
+# backend/landmark_recording.py
+"""Compact recording and replay of pose landmark streams.
+
+File layout (little endian):
+    header   magic "LMREC\\0", version, landmarks/frame, channels/landmark,
+             dtype code, compression code, metadata length, metadata JSON
+    chunks   repeated: frame count, payload length, payload
+             payload = timestamps (float64, n) + landmarks (dtype, n x 33 x 4)
+
+Uncompressed files are read with np.memmap (no copies); compressed chunks
+are inflated one at a time, so memory stays bounded by the chunk size.
+"""
+import collections
+import json
+import os
+import struct
+import time
+import zlib
+
+import numpy as np
+
+MAGIC = b"LMREC\0"
+VERSION = 1
+NUM_LANDMARKS = 33
+NUM_CHANNELS = 4  # x, y, z, visibility
+
+_HEADER = struct.Struct("<6sHHHBBI")
+_CHUNK = struct.Struct("<IQ")
+
+DTYPES = {0: np.float16, 1: np.float32}
+DTYPE_CODES = {np.dtype(v): k for k, v in DTYPES.items()}
+COMPRESSION_NONE, COMPRESSION_ZLIB = 0, 1
+
+# Same attribute names as mediapipe's NormalizedLandmark, so ExerciseMonitor can't tell the difference
+Landmark = collections.namedtuple("Landmark", "x y z visibility")
+
+
+def landmarks_to_array(landmarks):
+    """mediapipe landmark list (or any 33 x 4 sequence) -> float32 array"""
+    if isinstance(landmarks, np.ndarray):
+        return landmarks.astype(np.float32, copy=False).reshape(NUM_LANDMARKS, NUM_CHANNELS)
+    return np.array([(l.x, l.y, l.z, l.visibility) for l in landmarks], dtype=np.float32)
+
+
+def array_to_landmarks(frame):
+    return [Landmark(*row) for row in frame.tolist()]
+
+
+class LandmarkRecorder:
+    def __init__(self, path, chunk_frames=256, dtype="float16", compress=True, metadata=None):
+        self.path = path
+        self.chunk_frames = chunk_frames
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in DTYPE_CODES:
+            raise ValueError(f"Unsupported dtype '{dtype}', use float16 or float32")
+        self.compression = COMPRESSION_ZLIB if compress else COMPRESSION_NONE
+        self.frames = 0
+
+        self._timestamps = np.empty(chunk_frames, dtype=np.float64)
+        self._landmarks = np.empty((chunk_frames, NUM_LANDMARKS, NUM_CHANNELS), dtype=self.dtype)
+        self._pending = 0
+
+        meta = json.dumps(metadata or {}).encode("utf-8")
+        self._file = open(path, "wb")
+        self._file.write(_HEADER.pack(MAGIC, VERSION, NUM_LANDMARKS, NUM_CHANNELS,
+                                      DTYPE_CODES[self.dtype], self.compression, len(meta)))
+        self._file.write(meta)
+
+    def add(self, landmarks, timestamp=None):
+        """Append one frame; flushes a chunk every chunk_frames frames"""
+        i = self._pending
+        self._timestamps[i] = time.time() if timestamp is None else timestamp
+        self._landmarks[i] = landmarks_to_array(landmarks)
+        self._pending += 1
+        self.frames += 1
+        if self._pending == self.chunk_frames:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        n = self._pending
+        payload = self._timestamps[:n].tobytes() + self._landmarks[:n].tobytes()
+        if self.compression == COMPRESSION_ZLIB:
+            payload = zlib.compress(payload, 6)
+        self._file.write(_CHUNK.pack(n, len(payload)))
+        self._file.write(payload)
+        self._file.flush()
+        self._pending = 0
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LandmarkRecording:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                magic, version, n_lm, n_ch, dtype_code, compression, meta_len = _HEADER.unpack(f.read(_HEADER.size))
+            except struct.error:
+                raise ValueError(f"{path} is too short to be a landmark recording") from None
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a landmark recording")
+            if version != VERSION:
+                raise ValueError(f"Unsupported recording version {version}")
+            if dtype_code not in DTYPES:
+                raise ValueError(f"Unsupported dtype code {dtype_code}")
+            self.metadata = json.loads(f.read(meta_len) or b"{}")
+            self.dtype = np.dtype(DTYPES[dtype_code])
+            self.compression = compression
+            self.shape = (n_lm, n_ch)
+
+            # Index chunk offsets by skipping over payloads. A file cut off by a crash
+            # (or still being written) ends in a partial chunk, which is left out
+            self._chunks = []
+            offset = _HEADER.size + meta_len
+            size = os.fstat(f.fileno()).st_size
+            frame_bytes = 8 + self.dtype.itemsize * n_lm * n_ch
+            while offset + _CHUNK.size <= size:
+                f.seek(offset)
+                n, length = _CHUNK.unpack(f.read(_CHUNK.size))
+                if offset + _CHUNK.size + length > size:
+                    break
+                if compression == COMPRESSION_NONE and length != n * frame_bytes:
+                    raise ValueError(f"Corrupt chunk at byte {offset} of {path}")
+                self._chunks.append((n, offset + _CHUNK.size, length))
+                offset += _CHUNK.size + length
+            self.truncated = offset < size  # trailing bytes that are not a whole chunk
+
+        self.frames = sum(n for n, _, _ in self._chunks)
+
+    def __len__(self):
+        return self.frames
+
+    def chunks(self):
+        """Yield (timestamps, landmarks) array pairs chunk by chunk"""
+        frame_bytes = self.dtype.itemsize * self.shape[0] * self.shape[1]
+        if self.compression == COMPRESSION_NONE:
+            mm = np.memmap(self.path, dtype=np.uint8, mode="r")
+            for n, offset, length in self._chunks:
+                ts = mm[offset:offset + 8 * n].view(np.float64)
+                lm = mm[offset + 8 * n:offset + 8 * n + n * frame_bytes].view(self.dtype).reshape(n, *self.shape)
+                yield ts, lm
+            return
+
+        with open(self.path, "rb") as f:
+            for n, offset, length in self._chunks:
+                f.seek(offset)
+                try:
+                    raw = zlib.decompress(f.read(length))
+                except zlib.error as e:
+                    raise ValueError(f"Corrupt chunk at byte {offset} of {self.path}: {e}") from None
+                ts = np.frombuffer(raw, dtype=np.float64, count=n)
+                lm = np.frombuffer(raw, dtype=self.dtype, offset=8 * n).reshape(n, *self.shape)
+                yield ts, lm
+
+    def arrays(self):
+        """Whole recording as (timestamps[T], landmarks[T, 33, 4]) float arrays"""
+        parts = list(self.chunks())
+        if not parts:
+            return np.empty(0), np.empty((0, *self.shape), dtype=np.float32)
+        return (np.concatenate([t for t, _ in parts]),
+                np.concatenate([l for _, l in parts]).astype(np.float32))
+
+
+class ReplaySource:
+    """Iterate a recording as (timestamp, landmarks) frames.
+
+    speed=1.0 replays in real time, 2.0 twice as fast; speed=0 (or None)
+    replays as fast as the consumer can take frames.
+    """
+
+    def __init__(self, recording, speed=0):
+        self.recording = recording if isinstance(recording, LandmarkRecording) else LandmarkRecording(recording)
+        self.speed = speed
+
+    def __len__(self):
+        return len(self.recording)
+
+    def __iter__(self):
+        start_wall = time.perf_counter()
+        start_ts = None
+        for timestamps, landmarks in self.recording.chunks():
+            for ts, frame in zip(timestamps.tolist(), landmarks.astype(np.float32)):
+                if start_ts is None:
+                    start_ts = ts
+                if self.speed:
+                    delay = (ts - start_ts) / self.speed - (time.perf_counter() - start_wall)
+                    if delay > 0:
+                        time.sleep(delay)
+                yield ts, array_to_landmarks(frame)
+
+
+def rescore(recording, exercise, monitor, speed=0):
+    """Feed a recording through an ExerciseMonitor using recorded timestamps"""
+    data = None
+    for ts, landmarks in ReplaySource(recording, speed):
+        data = monitor.analyze(exercise, landmarks, ts) or data
+    return data
+
+
+# -------------------- GridFS storage --------------------
+def save_to_gridfs(path, db=None, filename=None):
+    """Upload a recording to GridFS, returning its file id"""
+    import gridfs
+    if db is None:
+        from db.mongo import get_db
+        db = get_db()
+    recording = LandmarkRecording(path)
+    fs = gridfs.GridFS(db, collection="landmark_recordings")
+    with open(path, "rb") as f:
+        return fs.put(f, filename=filename or os.path.basename(path),
+                      metadata={**recording.metadata, "frames": recording.frames})
+
+
+def load_from_gridfs(file_id, dest_path, db=None):
+    """Download a recording from GridFS to dest_path (so it can be memory-mapped)"""
+    import gridfs
+    if db is None:
+        from db.mongo import get_db
+        db = get_db()
+    fs = gridfs.GridFS(db, collection="landmark_recordings")
+    with open(dest_path, "wb") as f:
+        f.write(fs.get(file_id).read())
+    return dest_path
@@ -0,0 +1,252 @@
+# backend/metrics.py
+"""Process-wide latency histograms and counters in Prometheus text format.
+
+Metrics are declared next to the code they measure and rendered by the
+services' /metrics routes:
+
+    PROCESS_SECONDS = metrics.histogram("pose_process_seconds", "MediaPipe inference per frame")
+    with PROCESS_SECONDS.time():
+        results = pose.process(image)
+
+    SEARCH_SECONDS = metrics.histogram("nutrition_search_food_seconds", "...", ["source"])
+    SEARCH_SECONDS.labels("cache").observe(elapsed)
+
+Set METRICS_ENABLED=0 to switch recording off: time() and labels() then hand
+back a shared no-op, so an instrumented hot path costs one method call.
+
+Only depends on the standard library (flask is imported when a response is
+built), so headless code such as exercise_monitor can use it.
+"""
+import bisect
+import os
+import threading
+import time
+
+ENABLED = os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no", "off")
+
+# Seconds; spans a sub-millisecond angle update up to a slow upstream API call
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class _Null:
+    """Stand-in for every series (and timer) while metrics are disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def time(self):
+        return self
+
+
+_NULL = _Null()
+
+
+class _Timer:
+    __slots__ = ("series", "start")
+
+    def __init__(self, series):
+        self.series = series
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.series.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _HistogramSeries:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def time(self):
+        return _Timer(self)
+
+    def samples(self, name, labels):
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        cumulative = 0
+        for bound, count in zip(self.bounds + (float("inf"),), counts):
+            cumulative += count
+            yield f"{name}_bucket", labels + (("le", _format_value(bound)),), cumulative
+        yield f"{name}_sum", labels, total
+        yield f"{name}_count", labels, cumulative
+
+
+class _CounterSeries:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name, labels):
+        yield name, labels, self.value
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+        # Unlabelled metrics are their own single series
+        self._default = None if self.labelnames else self._new_series()
+
+    def _new_series(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        if not ENABLED:
+            return _NULL
+        series = self._series.get(values)
+        if series is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                series = self._series.setdefault(values, self._new_series())
+        return series
+
+    def _all_series(self):
+        if self._default is not None:
+            return [((), self._default)]
+        return [(tuple(zip(self.labelnames, map(str, values))), series)
+                for values, series in list(self._series.items())]
+
+    @property
+    def exposed_name(self):
+        """Name in the text format; HELP/TYPE must use the same name as the samples"""
+        return self.name
+
+    def render(self):
+        name = self.exposed_name
+        lines = [f"# HELP {name} {self.help}", f"# TYPE {name} {self.kind}"]
+        for labels, series in self._all_series():
+            for sample, sample_labels, value in series.samples(name, labels):
+                lines.append(f"{sample}{_format_labels(sample_labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames)
+
+    def _new_series(self):
+        return _HistogramSeries(self.bounds)
+
+    def observe(self, value):
+        if ENABLED:
+            self._default.observe(value)
+
+    def time(self):
+        """Context manager recording the elapsed seconds of its block"""
+        return _Timer(self._default) if ENABLED else _NULL
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    @property
+    def exposed_name(self):
+        return f"{self.name}_total"
+
+    def _new_series(self):
+        return _CounterSeries()
+
+    def inc(self, amount=1):
+        if ENABLED:
+            self._default.inc(amount)
+
+
+def _register(cls, name, *args, **kwargs):
+    # Get-or-create, so a module imported twice (e.g. as __main__ and by name) shares its metrics
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, *args, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+        return metric
+
+
+def histogram(name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+    return _register(Histogram, name, help, labelnames, buckets)
+
+
+def counter(name, help, labelnames=()):
+    """Counter; exposed (HELP, TYPE and samples) as <name>_total"""
+    return _register(Counter, name, help, labelnames)
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def render():
+    """Every registered metric in Prometheus text exposition format"""
+    with _registry_lock:
+        metrics = sorted(_registry.values(), key=lambda m: m.name)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def metrics_response():
+    """Flask response for a /metrics route"""
+    from flask import Response
+
+    if not ENABLED:
+        return Response("metrics disabled (METRICS_ENABLED=0)\n", status=404, mimetype="text/plain")
+    return Response(render(), content_type=CONTENT_TYPE)
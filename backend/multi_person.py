@@ -0,0 +1,368 @@
+# backend/multi_person.py
+"""Multi-person rep counting for group classes in front of one camera.
+
+PersonTracker gives every detected person a stable ID across frames, and
+GroupMonitor keeps each track's rep state in flat per-track arrays (one
+slot per track, reused when a track expires). Each frame, all people are
+advanced in one vectorized pass: joint angles, One Euro smoothing, the
+RepState up/down machine and the RepMetrics tempo/ROM/tension numbers.
+Per person it counts exactly what ExerciseMonitor would.
+
+Only depends on numpy, like exercise_monitor; detection (MediaPipe
+PoseLandmarker with num_poses) lives in pose_pipeline.
+"""
+import threading
+
+import numpy as np
+
+import metrics
+from exercise_monitor import REP_THRESHOLDS, REPS, PoseLandmark as PL, RepState
+from joint_signals import OneEuroFilter, RepMetrics, _alpha
+
+UPDATE_SECONDS = metrics.histogram("group_update_seconds", "Tracking and rep counting for every person in a frame")
+TRACKS = metrics.counter("group_tracks", "Person tracks started")
+
+# (left joints, right joints, how the two sides combine) per exercise; the
+# middle joint is the vertex and None stands for a point straight above it
+ANGLE_JOINTS = {
+    'bicep': ((PL.LEFT_SHOULDER, PL.LEFT_ELBOW, PL.LEFT_WRIST),
+              (PL.RIGHT_SHOULDER, PL.RIGHT_ELBOW, PL.RIGHT_WRIST), 'min'),
+    'pushup': ((PL.LEFT_SHOULDER, PL.LEFT_ELBOW, PL.LEFT_WRIST),
+               (PL.RIGHT_SHOULDER, PL.RIGHT_ELBOW, PL.RIGHT_WRIST), 'mean'),
+    'squat': ((PL.LEFT_HIP, PL.LEFT_KNEE, PL.LEFT_ANKLE),
+              (PL.RIGHT_HIP, PL.RIGHT_KNEE, PL.RIGHT_ANKLE), 'mean'),
+    'lunge': ((PL.LEFT_HIP, PL.LEFT_KNEE, PL.LEFT_ANKLE),
+              (PL.RIGHT_HIP, PL.RIGHT_KNEE, PL.RIGHT_ANKLE), 'min'),
+    'shoulder': ((PL.LEFT_ELBOW, PL.LEFT_SHOULDER, None),
+                 (PL.RIGHT_ELBOW, PL.RIGHT_SHOULDER, None), 'mean'),
+}
+
+# Read from the scalar implementations so tuning them keeps both engines in step
+MIN_CUTOFF, BETA, D_CUTOFF = OneEuroFilter.MIN_CUTOFF, OneEuroFilter.BETA, OneEuroFilter.D_CUTOFF
+MOVING_VELOCITY = RepMetrics.MOVING_VELOCITY
+
+# GroupMonitor.last_rep columns, as reported (and rounded) in current_data
+LAST_REP_FIELDS = ('tempo', 'rom', 'time_under_tension', 'peak_velocity')
+LAST_REP_DECIMALS = (2, 1, 2, 1)
+
+
+def joint_angles(poses, exercise):
+    """(P, 33, >=2) landmarks -> (rep angle, left angle, right angle), each (P,) degrees"""
+    left, right, combine = ANGLE_JOINTS[exercise]
+    xy = np.asarray(poses, dtype=np.float64)[..., :2]
+    a = xy[:, [left[0], right[0]]]
+    b = xy[:, [left[1], right[1]]]
+    c = b + (0.0, -0.3) if left[2] is None else xy[:, [left[2], right[2]]]
+    ba, bc = a - b, c - b
+    cos = (ba * bc).sum(-1) / (np.linalg.norm(ba, axis=-1) * np.linalg.norm(bc, axis=-1) + 1e-8)
+    angles = np.degrees(np.arccos(np.clip(cos, -1.0, 1.0)))
+    combined = angles.min(axis=1) if combine == 'min' else angles.mean(axis=1)
+    return combined, angles[:, 0], angles[:, 1]
+
+
+# -------------------- Tracking --------------------
+class PersonTracker:
+    """Greedy frame-to-frame matching of detected poses to tracks.
+
+    The cost is the mean distance over keypoints visible in both poses,
+    relative to the track's body size, with each track's last pose moved
+    along its keypoint velocity, so people who cross paths keep their IDs.
+    Tracks unseen for `max_age` seconds expire and their slot is reused.
+    """
+
+    def __init__(self, max_people=8, max_age=1.0, max_distance=0.5, min_visibility=0.5):
+        self.capacity = max_people
+        self.max_age = max_age
+        self.max_distance = max_distance
+        self.min_visibility = min_visibility
+        self.ids = np.full(max_people, -1, dtype=np.int64)   # -1 = free slot
+        self.poses = np.zeros((max_people, 33, 2))
+        self.velocity = np.zeros((max_people, 33, 2))
+        self.visible = np.zeros((max_people, 33), dtype=bool)
+        self.size = np.ones(max_people)                     # bounding-box diagonal of the visible keypoints
+        self.last_seen = np.full(max_people, np.nan)
+        self._next_id = 1
+
+    def active(self):
+        return np.flatnonzero(self.ids >= 0)
+
+    def _cost(self, slots, xy, visible, timestamp):
+        gap = np.clip(timestamp - self.last_seen[slots], 0.0, self.max_age)
+        predicted = self.poses[slots] + self.velocity[slots] * gap[:, None, None]
+        shared = self.visible[slots][:, None, :] & visible[None, :, :]              # (T, N, 33)
+        dx = predicted[:, None, :, 0] - xy[None, :, :, 0]
+        dy = predicted[:, None, :, 1] - xy[None, :, :, 1]
+        dist = np.sqrt(dx * dx + dy * dy)                                           # (T, N, 33)
+        n = np.count_nonzero(shared, axis=-1)
+        mean = np.where(shared, dist, 0.0).sum(-1) / np.maximum(n, 1)
+        cost = mean / self.size[slots][:, None]
+        cost[n < 4] = np.inf
+        return cost
+
+    def update(self, poses, timestamp):
+        """Assign this frame's detections (N, 33, 4) to tracks.
+
+        Returns (slot per detection or -1 when over capacity, slots of tracks
+        started this frame, slots of tracks that expired this frame).
+        """
+        poses = np.asarray(poses, dtype=np.float64)
+        if poses.size == 0:
+            poses = poses.reshape(0, 33, 4)
+        xy, visible = poses[..., :2], poses[..., 3] > self.min_visibility
+        assigned = np.full(len(poses), -1, dtype=np.int64)
+
+        slots = self.active()
+        if len(slots) and len(poses):
+            cost = self._cost(slots, xy, visible, timestamp)
+            order = np.argsort(cost, axis=None)
+            order = order[cost.ravel()[order] <= self.max_distance].tolist()
+            taken_tracks, taken_poses = set(), set()
+            pairs = min(len(slots), len(poses))
+            for flat in order:
+                t, d = divmod(flat, len(poses))
+                if t in taken_tracks or d in taken_poses:
+                    continue
+                taken_tracks.add(t)
+                taken_poses.add(d)
+                assigned[d] = slots[t]
+                if len(taken_poses) == pairs:
+                    break
+
+        matched = assigned >= 0
+        if matched.any():
+            s, d = assigned[matched], np.flatnonzero(matched)
+            dt = (timestamp - self.last_seen[s])[:, None, None]
+            both = (self.visible[s] & visible[d])[..., None]
+            step = np.where(both & (dt > 0), (xy[d] - self.poses[s]) / np.where(dt > 0, dt, 1.0), 0.0)
+            self.velocity[s] = 0.5 * self.velocity[s] + 0.5 * step
+            self._store(s, xy[d], visible[d], timestamp)
+
+        # New people, most visible first, while there are free slots
+        started = []
+        free = np.flatnonzero(self.ids < 0).tolist()
+        unmatched = np.flatnonzero(~matched)
+        counts = visible[unmatched].sum(-1)
+        order = np.argsort(-counts, kind="stable")
+        for d in unmatched[order][counts[order] >= 4].tolist():
+            if not free:
+                break
+            slot = free.pop(0)
+            self.ids[slot] = self._next_id
+            self._next_id += 1
+            self.velocity[slot] = 0.0
+            self._store(slot, xy[d], visible[d], timestamp)
+            assigned[d] = slot
+            started.append(slot)
+
+        expired = slots[(timestamp - self.last_seen[slots]) > self.max_age] if len(slots) else slots
+        self.ids[expired] = -1
+        self.last_seen[expired] = np.nan
+        return assigned, np.array(started, dtype=np.int64), expired
+
+    def _store(self, slots, xy, visible, timestamp):
+        self.poses[slots] = xy
+        self.visible[slots] = visible
+        self.last_seen[slots] = timestamp
+        # Track size, so the match cost does not depend on how far people stand from the camera
+        x, y = np.where(visible, xy[..., 0], np.nan), np.where(visible, xy[..., 1], np.nan)
+        with np.errstate(invalid="ignore"):
+            size = np.hypot(np.fmax.reduce(x, -1) - np.fmin.reduce(x, -1),
+                            np.fmax.reduce(y, -1) - np.fmin.reduce(y, -1))
+        self.size[slots] = np.where(np.isnan(size), 1.0, np.maximum(size, 0.05))
+
+    def reset(self):
+        self.ids[:] = -1
+        self.last_seen[:] = np.nan
+
+
+# -------------------- Rep counting --------------------
+class GroupMonitor:
+    """Rep counters for everyone in front of the camera, doing one exercise.
+
+    Thread-safe: the streaming thread calls update() while request handlers
+    read current_data, reset counters or switch the exercise.
+    """
+
+    def __init__(self, exercise="squat", max_people=8, max_age=1.0):
+        self._lock = threading.RLock()
+        self.tracker = PersonTracker(max_people, max_age)
+        self.capacity = max_people
+        self.last_ids = np.zeros(0, dtype=np.int64)  # track ID per detection of the last frame
+        self._seen = np.zeros(max_people, dtype=bool)
+        self.frame_time = None
+        self.set_exercise(exercise)
+
+    # --- per-track state (struct of arrays, one row per slot) ---
+    def _reset_slots(self, slots):
+        # One Euro filter
+        self.x[slots] = np.nan
+        self.dx[slots] = np.nan
+        self.t[slots] = np.nan
+        self.velocity[slots] = 0.0
+        # RepState
+        self.up[slots] = False
+        self.count[slots] = 0
+        self.last_rep_time[slots] = np.nan
+        self.last_transition[slots] = np.nan
+        self.avg_period[slots] = np.nan
+        # RepMetrics
+        self.rep_start[slots] = np.nan
+        self.low[slots] = np.nan
+        self.high[slots] = np.nan
+        self.tut[slots] = 0.0
+        self.peak[slots] = 0.0
+        self.metrics_t[slots] = np.nan
+        self.last_rep[slots] = np.nan  # tempo, rom, time under tension, peak velocity
+        self.symmetry[slots] = 0.0
+
+    def set_exercise(self, exercise):
+        """Switch the whole group to another exercise; counters start again"""
+        if exercise not in REP_THRESHOLDS:
+            raise ValueError(f"Unknown exercise '{exercise}'")
+        with self._lock:
+            self.exercise = exercise
+            self.up_thresh, self.down_thresh, self.min_rep_interval = REP_THRESHOLDS[exercise]
+            n = self.capacity
+            self.x, self.dx, self.t, self.velocity = (np.empty(n) for _ in range(4))
+            self.up = np.empty(n, dtype=bool)
+            self.count = np.empty(n, dtype=np.int32)
+            self.last_rep_time, self.last_transition, self.avg_period = (np.empty(n) for _ in range(3))
+            self.rep_start, self.low, self.high, self.tut, self.peak, self.metrics_t = (np.empty(n) for _ in range(6))
+            self.last_rep = np.empty((n, 4))
+            self.symmetry = np.empty(n)
+            self._reset_slots(slice(None))
+
+    def reset(self, track_id=None):
+        """Zero one person's counter, or everyone's (and forget the tracks)"""
+        with self._lock:
+            if track_id is None:
+                self.tracker.reset()
+                self._reset_slots(slice(None))
+                return True
+            slots = np.flatnonzero(self.tracker.ids == track_id)
+            self._reset_slots(slots)
+            return len(slots) > 0
+
+    def _smooth(self, s, raw, now):
+        """Vectorized OneEuroFilter.__call__ for slots s"""
+        prev_t, prev_x, prev_dx = self.t[s], self.x[s], self.dx[s]
+        first = np.isnan(prev_t)
+        dt = now - prev_t
+        valid = ~first & (dt > 0)
+        dt = np.where(valid, dt, 1.0)
+
+        raw_dx = (raw - np.where(first, raw, prev_x)) / dt
+        a_d = _alpha(D_CUTOFF, dt)
+        dx = np.where(np.isnan(prev_dx), raw_dx, a_d * raw_dx + (1 - a_d) * prev_dx)
+        velocity = np.where(valid, dx, self.velocity[s])
+        a = _alpha(MIN_CUTOFF + BETA * np.abs(velocity), dt)
+        smoothed = np.where(first, raw, np.where(valid, a * raw + (1 - a) * prev_x, prev_x))
+
+        self.dx[s] = np.where(valid, dx, prev_dx)
+        self.velocity[s] = velocity
+        self.x[s] = smoothed
+        self.t[s] = np.where(first | valid, now, prev_t)
+        return smoothed, velocity
+
+    def _count(self, s, angle, now):
+        """Vectorized RepState.update for slots s; returns which slots counted a rep"""
+        up = self.up[s]
+        rising = ~up & (angle > self.up_thresh)
+
+        last_transition = self.last_transition[s]
+        period = now - last_transition
+        update = rising & ~np.isnan(last_transition) & (period >= RepState.MIN_PERIOD)
+        avg = self.avg_period[s]
+        avg = np.where(update, np.where(np.isnan(avg), period, 0.7 * avg + 0.3 * period), avg)
+        self.avg_period[s] = avg
+        self.last_transition[s] = np.where(rising, now, last_transition)
+
+        interval = np.where(np.isnan(avg), self.min_rep_interval,
+                            np.minimum(self.min_rep_interval, np.maximum(RepState.MIN_PERIOD, 0.5 * avg)))
+        last_rep = self.last_rep_time[s]
+        counted = rising & (np.isnan(last_rep) | (now - last_rep > interval))
+        self.count[s] += counted
+        self.last_rep_time[s] = np.where(counted, now, last_rep)
+        self.up[s] = rising | (up & ~(angle < self.down_thresh))
+        return counted
+
+    def _measure(self, s, angle, velocity, now, counted):
+        """Vectorized RepMetrics.update for slots s"""
+        last_t = self.metrics_t[s]
+        moving = ~np.isnan(last_t) & (now > last_t) & (np.abs(velocity) > MOVING_VELOCITY)
+        self.tut[s] += np.where(moving, now - last_t, 0.0)
+        self.metrics_t[s] = now
+        self.low[s] = np.fmin(self.low[s], angle)
+        self.high[s] = np.fmax(self.high[s], angle)
+        self.peak[s] = np.maximum(self.peak[s], np.abs(velocity))
+
+        if counted.any():
+            done = s[counted]
+            finished = done[~np.isnan(self.rep_start[done])]
+            self.last_rep[finished] = np.column_stack([
+                now - self.rep_start[finished], self.high[finished] - self.low[finished],
+                self.tut[finished], self.peak[finished]])
+            self.rep_start[done] = now
+            self.low[done] = self.high[done] = angle[counted]
+            self.tut[done] = 0.0
+            self.peak[done] = 0.0
+
+    def update(self, poses, timestamp):
+        """Advance every person by one frame of detections (N, 33, 4).
+
+        Returns (track ID, rep count) per detection, -1/0 for people over capacity;
+        current_data has the full per-person state.
+        """
+        poses = np.asarray(poses, dtype=np.float32)
+        with self._lock, UPDATE_SECONDS.time():
+            self.frame_time = timestamp
+            slots, started, expired = self.tracker.update(poses, timestamp)
+            for changed in (expired, started):
+                if len(changed):
+                    self._reset_slots(changed)
+            TRACKS.inc(len(started))
+
+            seen = slots >= 0
+            s = slots[seen]
+            if len(s):
+                raw, left, right = joint_angles(poses[seen], self.exercise)
+                self.symmetry[s] = np.abs(left - right)
+                angle, velocity = self._smooth(s, raw, timestamp)
+                counted = self._count(s, angle, timestamp)
+                self._measure(s, angle, velocity, timestamp, counted)
+                if counted.any():
+                    REPS.labels(self.exercise).inc(int(counted.sum()))
+
+            self._seen[:] = False
+            self._seen[s] = True
+            safe = np.maximum(slots, 0)
+            self.last_ids = np.where(seen, self.tracker.ids[safe], -1)
+            return self.last_ids, np.where(seen, self.count[safe], 0)
+
+    @property
+    def current_data(self):
+        """Everyone currently tracked, by ID (built on request, not every frame)"""
+        with self._lock:
+            active = self.tracker.active()
+            slots = active[np.argsort(self.tracker.ids[active])]
+            last_rep = self.last_rep[slots]
+            rounded = np.column_stack([np.round(last_rep[:, i], d) for i, d in enumerate(LAST_REP_DECIMALS)])
+            columns = zip(
+                self.tracker.ids[slots].tolist(), self._seen[slots].tolist(), self.count[slots].tolist(),
+                self.up[slots].tolist(), np.round(np.nan_to_num(self.x[slots]), 1).tolist(),
+                np.round(self.velocity[slots], 1).tolist(), np.round(self.symmetry[slots], 1).tolist(),
+                np.isnan(last_rep[:, 0]).tolist(), rounded.tolist())
+            exercise = self.exercise
+        return {
+            'exercise': exercise,
+            'people': [{
+                'id': track_id,
+                'visible': visible,
+                'reps': reps,
+                'stage': "up" if up else "down",
+                'angle': angle,
+                'velocity': velocity,
+                'symmetry': symmetry,
+                'last_rep': None if no_rep else dict(zip(LAST_REP_FIELDS, rep)),
+            } for track_id, visible, reps, up, angle, velocity, symmetry, no_rep, rep in columns],
+        }
@@ -1,15 +1,25 @@
 # backend/nutrition_server.py
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import requests
 import os
+import asyncio
 import json
+import time
 
+import metrics
+from serialization import json_response, parse_fields, project, project_all, request_params
+from db import mongo
+from db.history import check_user_id, get_history_store, to_utc
+from warmup import Warmup, serving_process, readiness_response
 
 
 app = Flask(__name__)
 CORS(app)
 
+# Labelled by where the answer came from: cache, edamam, nutritionix, local, estimated or none
+SEARCH_SECONDS = metrics.histogram("nutrition_search_food_seconds", "search_food lookup by answering source", ["source"])
+API_ERRORS = metrics.counter("nutrition_api_errors", "Upstream nutrition API calls that raised or returned a non-200 status", ["source"])
+
 class NutritionTracker:
     def __init__(self):
         # You can get free API keys from:
@@ -28,9 +38,11 @@ class NutritionTracker:
     def search_food(self, query):
         """Search for food nutrition using multiple API fallbacks"""
         query = query.lower().strip()
+        start = time.perf_counter()
         
         # Check cache first
         if query in self.cache:
+            SEARCH_SECONDS.labels('cache').observe(time.perf_counter() - start)
             return self.cache[query]
         
         # Try Edamam API first
@@ -47,40 +59,80 @@ class NutritionTracker:
         if result:
             self.cache[query] = result
         
+        SEARCH_SECONDS.labels(result['source'] if result else 'none').observe(time.perf_counter() - start)
         return result
     
+    def _edamam_request(self, query):
+        url = "https://api.edamam.com/api/food-database/v2/parser"
+        params = {
+            'app_id': self.api_keys['edamam_app_id'],
+            'app_key': self.api_keys['edamam_app_key'],
+            'ingr': query,
+            'nutrition-type': 'cooking'
+        }
+        return url, params
+    
+    def _parse_edamam(self, data, query):
+        if data.get('hints'):
+            food = data['hints'][0]['food']
+            nutrients = food.get('nutrients', {})
+            
+            return {
+                'name': food.get('label', query),
+                'category': food.get('category', 'generic'),
+                'serving_size': '100g',
+                'calories': nutrients.get('ENERC_KCAL', 0),
+                'protein': nutrients.get('PROCNT', 0),
+                'carbs': nutrients.get('CHOCDF', 0),
+                'fat': nutrients.get('FAT', 0),
+                'fiber': nutrients.get('FIBTG', 0),
+                'sugar': nutrients.get('SUGAR', 0),
+                'source': 'edamam'
+            }
+        return None
+    
+    def _nutritionix_request(self, query):
+        url = "https://trackapi.nutritionix.com/v2/natural/nutrients"
+        headers = {
+            'x-app-id': self.api_keys['nutritionix_app_id'],
+            'x-app-key': self.api_keys['nutritionix_app_key'],
+            'Content-Type': 'application/json'
+        }
+        data = {
+            'query': query
+        }
+        return url, headers, data
+    
+    def _parse_nutritionix(self, data, query):
+        if data.get('foods'):
+            food = data['foods'][0]
+            
+            return {
+                'name': food.get('food_name', query),
+                'category': food.get('food_type', 'generic'),
+                'serving_size': food.get('serving_unit', '100g'),
+                'calories': food.get('nf_calories', 0),
+                'protein': food.get('nf_protein', 0),
+                'carbs': food.get('nf_total_carbohydrate', 0),
+                'fat': food.get('nf_total_fat', 0),
+                'fiber': food.get('nf_dietary_fiber', 0),
+                'sugar': food.get('nf_sugars', 0),
+                'source': 'nutritionix'
+            }
+        return None
+    
     def _search_edamam(self, query):
         """Search using Edamam Food Database API"""
         try:
-            url = "https://api.edamam.com/api/food-database/v2/parser"
-            params = {
-                'app_id': self.api_keys['edamam_app_id'],
-                'app_key': self.api_keys['edamam_app_key'],
-                'ingr': query,
-                'nutrition-type': 'cooking'
-            }
-            
+            import requests  # Deferred: only needed once a lookup misses the cache
+            url, params = self._edamam_request(query)
             response = requests.get(url, params=params, timeout=10)
             
             if response.status_code == 200:
-                data = response.json()
-                if data.get('hints'):
-                    food = data['hints'][0]['food']
-                    nutrients = food.get('nutrients', {})
-                    
-                    return {
-                        'name': food.get('label', query),
-                        'category': food.get('category', 'generic'),
-                        'serving_size': '100g',
-                        'calories': nutrients.get('ENERC_KCAL', 0),
-                        'protein': nutrients.get('PROCNT', 0),
-                        'carbs': nutrients.get('CHOCDF', 0),
-                        'fat': nutrients.get('FAT', 0),
-                        'fiber': nutrients.get('FIBTG', 0),
-                        'sugar': nutrients.get('SUGAR', 0),
-                        'source': 'edamam'
-                    }
+                return self._parse_edamam(response.json(), query)
+            API_ERRORS.labels('edamam').inc()
         except Exception as e:
+            API_ERRORS.labels('edamam').inc()
             print(f"Edamam API error: {e}")
         
         return None
@@ -88,40 +140,75 @@ class NutritionTracker:
     def _search_nutritionix(self, query):
         """Search using Nutritionix API"""
         try:
-            url = "https://trackapi.nutritionix.com/v2/natural/nutrients"
-            headers = {
-                'x-app-id': self.api_keys['nutritionix_app_id'],
-                'x-app-key': self.api_keys['nutritionix_app_key'],
-                'Content-Type': 'application/json'
-            }
-            data = {
-                'query': query
-            }
-            
+            import requests
+            url, headers, data = self._nutritionix_request(query)
             response = requests.post(url, json=data, headers=headers, timeout=10)
             
             if response.status_code == 200:
-                data = response.json()
-                if data.get('foods'):
-                    food = data['foods'][0]
-                    
-                    return {
-                        'name': food.get('food_name', query),
-                        'category': food.get('food_type', 'generic'),
-                        'serving_size': food.get('serving_unit', '100g'),
-                        'calories': food.get('nf_calories', 0),
-                        'protein': food.get('nf_protein', 0),
-                        'carbs': food.get('nf_total_carbohydrate', 0),
-                        'fat': food.get('nf_total_fat', 0),
-                        'fiber': food.get('nf_dietary_fiber', 0),
-                        'sugar': food.get('nf_sugars', 0),
-                        'source': 'nutritionix'
-                    }
+                return self._parse_nutritionix(response.json(), query)
+            API_ERRORS.labels('nutritionix').inc()
+        except Exception as e:
+            API_ERRORS.labels('nutritionix').inc()
+            print(f"Nutritionix API error: {e}")
+        
+        return None
+    
+    # --- Async variants (used by the ASGI gateway; share the same cache) ---
+    async def search_food_async(self, query, client):
+        """Same fallback chain as search_food, with non-blocking HTTP via an httpx.AsyncClient"""
+        query = query.lower().strip()
+        start = time.perf_counter()
+        
+        if query in self.cache:
+            SEARCH_SECONDS.labels('cache').observe(time.perf_counter() - start)
+            return self.cache[query]
+        
+        result = await self._search_edamam_async(query, client)
+        if not result:
+            result = await self._search_nutritionix_async(query, client)
+        
+        if not result:
+            result = self._search_local_database(query)
+        
+        if result:
+            self.cache[query] = result
+        
+        SEARCH_SECONDS.labels(result['source'] if result else 'none').observe(time.perf_counter() - start)
+        return result
+    
+    async def _search_edamam_async(self, query, client):
+        try:
+            url, params = self._edamam_request(query)
+            response = await client.get(url, params=params, timeout=10)
+            
+            if response.status_code == 200:
+                return self._parse_edamam(response.json(), query)
+            API_ERRORS.labels('edamam').inc()
+        except Exception as e:
+            API_ERRORS.labels('edamam').inc()
+            print(f"Edamam API error: {e}")
+        
+        return None
+    
+    async def _search_nutritionix_async(self, query, client):
+        try:
+            url, headers, data = self._nutritionix_request(query)
+            response = await client.post(url, json=data, headers=headers, timeout=10)
+            
+            if response.status_code == 200:
+                return self._parse_nutritionix(response.json(), query)
+            API_ERRORS.labels('nutritionix').inc()
         except Exception as e:
+            API_ERRORS.labels('nutritionix').inc()
             print(f"Nutritionix API error: {e}")
         
         return None
     
+    async def analyze_meal_async(self, food_items, client):
+        """analyze_meal with all lookups in flight concurrently"""
+        results = await asyncio.gather(*(self.search_food_async(item, client) for item in food_items))
+        return self._total_nutrition(results)
+    
     def _search_local_database(self, query):
         """Fallback to local database for common foods"""
         local_foods = {
@@ -181,13 +268,15 @@ class NutritionTracker:
     
     def analyze_meal(self, food_items):
         """Analyze multiple food items for total nutrition"""
+        return self._total_nutrition(self.search_food(food_item) for food_item in food_items)
+    
+    def _total_nutrition(self, foods):
         total_nutrition = {
             'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0, 
             'fiber': 0, 'sugar': 0, 'foods': []
         }
         
-        for food_item in food_items:
-            nutrition = self.search_food(food_item)
+        for nutrition in foods:
             if nutrition:
                 total_nutrition['calories'] += nutrition.get('calories', 0)
                 total_nutrition['protein'] += nutrition.get('protein', 0)
@@ -202,18 +291,39 @@ class NutritionTracker:
 # Initialize the tracker
 nutrition_tracker = NutritionTracker()
 
+def _warm_up(warmup):
+    with warmup.step("import_requests"):
+        import requests  # noqa: F401
+
+nutrition_warmup = Warmup("nutrition")
+
 @app.route('/nutrition/status')
 def nutrition_status():
     return jsonify({
         "status": "Nutrition Tracker Server Running",
+        "ready": nutrition_warmup.ready,
         "message": "Can analyze any food item using multiple data sources"
     })
 
-@app.route('/nutrition/search', methods=['POST'])
+@app.route('/nutrition/ready')
+def nutrition_ready():
+    # History reads and writes need Mongo, so a service without it is not ready
+    return readiness_response(nutrition_warmup, mongo=mongo.ping)
+
+@app.route('/nutrition/metrics')
+def nutrition_metrics():
+    return metrics.metrics_response()
+
+# Both lookups also answer GET (query string; food_items and fields comma-separated),
+# so repeated identical queries can be revalidated with If-None-Match
+@app.route('/nutrition/search', methods=['GET', 'POST'])
 def search_food():
     try:
-        data = request.get_json()
+        data = request_params()
+        if data is None:
+            return jsonify({"error": "Request body must be a JSON object"}), 400
         query = data.get('query', '').strip()
+        fields = parse_fields(data.get('fields'))
         
         if not query:
             return jsonify({"error": "Food query is required"}), 400
@@ -221,10 +331,10 @@ def search_food():
         result = nutrition_tracker.search_food(query)
         
         if result:
-            return jsonify({
+            return json_response({
                 "success": True,
                 "query": query,
-                "nutrition": result
+                "nutrition": project(result, fields)
             })
         else:
             return jsonify({
@@ -235,18 +345,22 @@ def search_food():
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
-@app.route('/nutrition/analyze-meal', methods=['POST'])
+@app.route('/nutrition/analyze-meal', methods=['GET', 'POST'])
 def analyze_meal():
     try:
-        data = request.get_json()
+        data = request_params(lists=('food_items',))
+        if data is None:
+            return jsonify({"error": "Request body must be a JSON object"}), 400
         food_items = data.get('food_items', [])
+        fields = parse_fields(data.get('fields'))
         
         if not food_items:
             return jsonify({"error": "Food items list is required"}), 400
         
         analysis = nutrition_tracker.analyze_meal(food_items)
+        analysis['foods'] = project_all(analysis['foods'], fields)
         
-        return jsonify({
+        return json_response({
             "success": True,
             "food_count": len(food_items),
             "total_nutrition": analysis
@@ -258,6 +372,67 @@ def analyze_meal():
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/nutrition/log', methods=['POST'])
+def log_meal():
+    try:
+        data = request_params()
+        if data is None:
+            return jsonify({"error": "Request body must be a JSON object"}), 400
+        user_id = data.get('user_id')
+        food_items = data.get('food_items', [])
+        
+        try:
+            check_user_id(user_id)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if not food_items:
+            return jsonify({"error": "Food items list is required"}), 400
+        if not isinstance(food_items, list) or not all(isinstance(f, str) and f.strip() for f in food_items):
+            return jsonify({"error": "food_items must be a list of food names"}), 400
+        try:
+            timestamp = to_utc(data.get('timestamp'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        analysis = nutrition_tracker.analyze_meal(food_items)
+        get_history_store().record_nutrition(user_id, analysis, food_items, timestamp)
+        
+        return jsonify({
+            "success": True,
+            "food_count": len(food_items),
+            "total_nutrition": analysis
+        })
+        
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/nutrition/history')
+def nutrition_history():
+    try:
+        user_id = request.args.get('user_id')
+        period = request.args.get('period', 'day')
+        days = request.args.get('days', 30, type=int)
+        
+        if not user_id:
+            return jsonify({"error": "user_id is required"}), 400
+        
+        history = get_history_store().nutrition_history(user_id, period, days)
+        return jsonify({
+            "success": True,
+            "user_id": user_id,
+            "period": period,
+            "history": history
+        })
+        
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+# Warm up in the background once the routes are registered
+if serving_process(__name__):
+    nutrition_warmup.start(_warm_up)
+
 if __name__ == '__main__':
     print("🚀 Starting Nutrition Tracker Server on port 5003...")
     app.run(host='0.0.0.0', port=5003, debug=True)
\ No newline at end of file
@@ -0,0 +1,144 @@
+# backend/pose_pipeline.py
+"""Per-frame pose pipeline shared by the single-camera stream and the inference farm"""
+import os
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+import metrics
+
+mp_drawing = mp.solutions.drawing_utils
+mp_pose = mp.solutions.pose
+
+PROCESS_SECONDS = metrics.histogram("pose_process_seconds", "MediaPipe pose inference per frame")
+ENCODE_SECONDS = metrics.histogram("pose_jpeg_encode_seconds", "JPEG encoding of an annotated frame")
+FRAMES = metrics.counter("pose_frames", "Frames run through pose inference", ["detected"])
+DETECT_SECONDS = metrics.histogram("pose_detect_people_seconds", "Multi-person PoseLandmarker inference per frame")
+
+# Multi-person detection uses the MediaPipe Tasks pose landmarker, whose model is
+# not bundled with the package; download it once, e.g.
+#   https://storage.googleapis.com/mediapipe-models/pose_landmarker/pose_landmarker_lite/float16/latest/pose_landmarker_lite.task
+POSE_LANDMARKER_MODEL = os.getenv("POSE_LANDMARKER_MODEL", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "models", "pose_landmarker_lite.task"))
+
+# One color per track ID (BGR)
+TRACK_COLORS = [(0, 255, 0), (255, 128, 0), (0, 200, 255), (255, 0, 255),
+                (0, 128, 255), (255, 255, 0), (128, 0, 255), (0, 255, 160)]
+
+
+def create_pose():
+    return mp_pose.Pose(min_detection_confidence=0.7, min_tracking_confidence=0.7)
+
+
+def process_frame(pose, monitor, frame, exercise, timestamp, flip=True):
+    """Run pose inference and rep analysis on one BGR frame.
+
+    Returns (annotated BGR image, landmarks or None, monitor data or None).
+    """
+    if flip:
+        frame = cv2.flip(frame, 1)
+    image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    image.flags.writeable = False
+    with PROCESS_SECONDS.time():
+        results = pose.process(image)
+    image.flags.writeable = True
+    image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+
+    if not results.pose_landmarks:
+        FRAMES.labels("false").inc()
+        return image, None, None
+    FRAMES.labels("true").inc()
+
+    lm = results.pose_landmarks.landmark
+    data = monitor.analyze(exercise, lm, timestamp)
+
+    if data:
+        mp_drawing.draw_landmarks(image, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
+
+        # Display info
+        cv2.putText(image, f"{exercise.upper()} REPS: {data['reps']}", (20, 40),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+        cv2.putText(image, f"Stage: {data['stage']}", (20, 80),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
+        cv2.putText(image, f"Angle: {data['angle']:.1f}°", (20, 110),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
+
+        # Display feedback
+        y = 150
+        for msg in data['feedback'][:3]:
+            cv2.putText(image, msg, (20, y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+            y += 30
+
+    return image, lm, data
+
+
+def encode_jpeg(image, quality=95):
+    with ENCODE_SECONDS.time():
+        ret, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer if ret else None
+
+
+# -------------------- Multi-person --------------------
+def create_multi_pose(num_poses=4, model_path=POSE_LANDMARKER_MODEL):
+    """PoseLandmarker in video mode detecting up to num_poses people per frame"""
+    if not os.path.isfile(model_path):
+        raise FileNotFoundError(f"Pose landmarker model not found at {model_path} "
+                                "(download pose_landmarker_lite.task and set POSE_LANDMARKER_MODEL)")
+    vision = mp.tasks.vision
+    options = vision.PoseLandmarkerOptions(
+        base_options=mp.tasks.BaseOptions(model_asset_path=model_path),
+        running_mode=vision.RunningMode.VIDEO,
+        num_poses=num_poses,
+        min_pose_detection_confidence=0.5,
+        min_pose_presence_confidence=0.5,
+        min_tracking_confidence=0.5,
+    )
+    return vision.PoseLandmarker.create_from_options(options)
+
+
+def detect_people(landmarker, image_rgb, timestamp):
+    """(P, 33, 4) x, y, z, visibility for everyone in an RGB frame.
+
+    timestamp is in seconds and must increase from frame to frame (video mode).
+    """
+    image = mp.Image(image_format=mp.ImageFormat.SRGB, data=np.ascontiguousarray(image_rgb))
+    with DETECT_SECONDS.time():
+        result = landmarker.detect_for_video(image, int(timestamp * 1000))
+    FRAMES.labels("true" if result.pose_landmarks else "false").inc()
+    if not result.pose_landmarks:
+        return np.zeros((0, 33, 4), dtype=np.float32)
+    return np.array([[(lm.x, lm.y, lm.z, lm.visibility or 0.0) for lm in person]
+                     for person in result.pose_landmarks], dtype=np.float32)
+
+
+def draw_person(image, pose, color, label=None, min_visibility=0.5):
+    h, w = image.shape[:2]
+    points = np.column_stack([pose[:, 0] * w, pose[:, 1] * h]).astype(int)
+    visible = pose[:, 3] > min_visibility
+    for a, b in mp_pose.POSE_CONNECTIONS:
+        if visible[a] and visible[b]:
+            cv2.line(image, tuple(points[a]), tuple(points[b]), color, 2)
+    for x, y in points[visible]:
+        cv2.circle(image, (int(x), int(y)), 3, color, -1)
+    if label and visible.any():
+        x, y = points[visible].min(axis=0)
+        cv2.putText(image, label, (int(x), max(int(y) - 10, 20)), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+
+
+def process_group_frame(landmarker, group, frame, timestamp, flip=True):
+    """Detect and track everyone in one BGR frame and advance their rep counters.
+
+    Returns (annotated BGR image, (P, 33, 4) poses, track ID per pose).
+    """
+    image = cv2.flip(frame, 1) if flip else frame.copy()
+    poses = detect_people(landmarker, cv2.cvtColor(image, cv2.COLOR_BGR2RGB), timestamp)
+    track_ids, reps = group.update(poses, timestamp)
+
+    for pose, track_id, count in zip(poses, track_ids.tolist(), reps.tolist()):
+        if track_id >= 0:
+            draw_person(image, pose, TRACK_COLORS[track_id % len(TRACK_COLORS)], f"#{track_id} {count}")
+
+    cv2.putText(image, f"{group.exercise.upper()} - {len(group.tracker.active())} people", (20, 40),
+                cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+    return image, poses, track_ids
@@ -0,0 +1,199 @@
+# backend/serialization.py
+"""Compact JSON responses for the recommendation and nutrition payloads.
+
+  * field projection: callers pass fields=name,calories,... (query string or
+    JSON body) and each meal/food dict is trimmed to those keys,
+  * a fast encoder: orjson, which writes numpy scalars/arrays natively (falls
+    back to the standard library with a numpy-aware default),
+  * compression negotiated from Accept-Encoding: brotli when the optional
+    `brotli` package is installed, else gzip; small bodies go out as-is,
+  * an ETag on every 200, so repeated identical GET queries revalidate to an
+    empty 304 instead of a full body.
+
+encode() is framework-neutral; json_response() wraps it for Flask and the
+gateway wraps it for Starlette.
+"""
+import datetime
+import gzip
+import hashlib
+import json
+import os
+
+import numpy as np
+
+import metrics
+
+try:
+    import orjson
+except ImportError:  # Slower, but same output
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Below this, compression costs more than the bytes it saves
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+SERIALIZE_SECONDS = metrics.histogram("response_serialize_seconds", "Encode (and compress) a JSON response", ["encoding"])
+
+
+def _default(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """Compact UTF-8 JSON bytes; NaN/inf become null so the output is always valid JSON"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(_finite(obj), default=lambda o: _finite(_default(o)),
+                      separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def _finite(obj):
+    if isinstance(obj, float) and not np.isfinite(obj):
+        return None
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    return obj
+
+
+# -------------------- Field projection --------------------
+def parse_fields(value):
+    """'name, calories' or ['name', 'calories'] -> ('name', 'calories'); empty -> None (all fields)"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = value.split(",")
+    fields = tuple(dict.fromkeys(str(f).strip() for f in value if str(f).strip()))
+    return fields or None
+
+
+def project(record, fields):
+    if fields is None:
+        return record
+    return {k: record[k] for k in fields if k in record}
+
+
+def project_all(records, fields):
+    if fields is None:
+        return records
+    return [project(r, fields) for r in records]
+
+
+# -------------------- Negotiation --------------------
+def _accepted_encodings(header):
+    accepted = {}
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    return accepted
+
+
+def negotiate_encoding(accept_encoding):
+    """'br', 'gzip' or None for the Accept-Encoding header value"""
+    accepted = _accepted_encodings(accept_encoding)
+    wildcard = accepted.get("*", 0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+def _compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _etag_matches(if_none_match, tag):
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        candidate = candidate.removeprefix("W/").strip('"')
+        # Encoded variants carry a -gzip/-br suffix but share the same content
+        if candidate.split("-", 1)[0] == tag:
+            return True
+    return False
+
+
+def encode(payload, status=200, method="GET", accept_encoding=None, if_none_match=None):
+    """(status, body bytes, headers) for a JSON payload, with ETag/304 and compression"""
+    encoding = None
+    with SERIALIZE_SECONDS.labels("identity").time():
+        body = dumps(payload)
+    headers = {"Content-Type": "application/json", "Vary": "Accept-Encoding"}
+
+    if status == 200:
+        tag = hashlib.blake2b(body, digest_size=12).hexdigest()
+        headers["ETag"] = f'"{tag}"'
+        # Let clients cache, but revalidate every time (cheap with the ETag)
+        headers["Cache-Control"] = "no-cache"
+        if method in ("GET", "HEAD") and _etag_matches(if_none_match, tag):
+            del headers["Content-Type"]
+            return 304, b"", headers
+
+    if len(body) >= COMPRESS_MIN_BYTES:
+        encoding = negotiate_encoding(accept_encoding)
+    if encoding:
+        with SERIALIZE_SECONDS.labels(encoding).time():
+            body = _compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+        if "ETag" in headers:
+            headers["ETag"] = f'"{tag}-{encoding}"'
+    return status, body, headers
+
+
+def json_response(payload, status=200):
+    """Flask counterpart of jsonify() using encode() for the current request"""
+    from flask import Response, request
+
+    status, body, headers = encode(payload, status, request.method,
+                                   request.headers.get("Accept-Encoding"),
+                                   request.headers.get("If-None-Match"))
+    return Response(body, status=status, headers=headers)
+
+
+def query_params(args, lists=()):
+    """Query-string mapping -> dict, splitting the `lists` keys on commas, so GET
+    requests can carry what POST bodies send as JSON arrays"""
+    params = dict(args.items())
+    for key in lists:
+        if key in params:
+            params[key] = [v.strip() for v in params[key].split(",") if v.strip()]
+    return params
+
+
+def request_params(lists=()):
+    """Parameters of the current Flask request: the JSON body for POST, the query
+    string otherwise; None when the body is JSON but not an object"""
+    from flask import request
+
+    if request.method == "POST":
+        data = request.get_json(silent=True)
+        if data is None:
+            return {}
+        return data if isinstance(data, dict) else None
+    return query_params(request.args, lists)
@@ -1,377 +1,377 @@
 from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
-import cv2
-import mediapipe as mp
-import numpy as np
-import collections
 import time
+import os
 import threading
 
+from db import mongo
+from db.history import check_user_id, get_history_store, to_utc
+from exercise_monitor import ExerciseMonitor
+import metrics
+from inference_farm import InferenceFarm
+from landmark_recording import LandmarkRecorder, LandmarkRecording, rescore
+from multi_person import GroupMonitor
+from serialization import request_params
+from warmup import Warmup, serving_process, readiness_response
+
 # -------------------- Flask Setup --------------------
 app = Flask(__name__)
 CORS(app)  # allow frontend to fetch video stream
 
-# -------------------- Mediapipe setup --------------------
-mp_drawing = mp.solutions.drawing_utils
-mp_pose = mp.solutions.pose
-
-# -------------------- Rep counting state --------------------
-class RepState:
-    def __init__(self, up_thresh, down_thresh, min_rep_interval=1.0):
-        self.up_thresh = up_thresh
-        self.down_thresh = down_thresh
-        self.stage = "down"  # Start in down position
-        self.count = 0
-        self.last_rep_time = 0.0
-        self.min_rep_interval = min_rep_interval
-        self.rep_in_progress = False
-
-    def update(self, angle):
-        now = time.time()
-        counted = False
-        
-        # Debug print
-        print(f"Angle: {angle:.1f}°, Stage: {self.stage}, Count: {self.count}")
-        
-        # Check for transitions
-        if self.stage == "down" and angle < self.down_thresh:
-            # Still in down position
-            pass
-        elif self.stage == "down" and angle > self.up_thresh:
-            # Moved to up position - count a rep
-            if now - self.last_rep_time > self.min_rep_interval:
-                self.count += 1
-                self.last_rep_time = now
-                counted = True
-                print(f"REP COUNTED! Total: {self.count}")
-            self.stage = "up"
-        elif self.stage == "up" and angle < self.down_thresh:
-            # Moved back to down position
-            self.stage = "down"
-        
-        return counted
-
-# -------------------- Helper functions --------------------
-def angle_between(a, b, c):
-    a, b, c = np.array(a), np.array(b), np.array(c)
-    ba, bc = a - b, c - b
-    cosang = np.dot(ba, bc) / ((np.linalg.norm(ba) * np.linalg.norm(bc)) + 1e-8)
-    return np.degrees(np.arccos(np.clip(cosang, -1.0, 1.0)))
-
-def get_lm(landmarks, lm):
-    return (landmarks[lm].x, landmarks[lm].y)
-
-# -------------------- Exercise Monitor --------------------
-class ExerciseMonitor:
-    def __init__(self):
-        self.states = {
-            'bicep': RepState(160, 60, 1.0),      # More lenient thresholds
-            'pushup': RepState(160, 100, 1.2),    # Adjusted for pushup angles
-            'squat': RepState(170, 90, 1.5),      # Squat has wider range
-            'lunge': RepState(170, 80, 1.3),      # Lunge angles
-            'shoulder': RepState(160, 80, 1.0),   # Shoulder press
-        }
-        self.angle_buffers = {k: collections.deque(maxlen=3) for k in self.states}  # Smaller buffer for faster response
-        self.current_data = {
-            'reps': 0,
-            'stage': None,
-            'feedback': [],
-            'symmetry': 0,
-            'angle': 0
-        }
-        self.last_count = 0  # Track last count to detect changes
-
-    def analyze(self, name, lm):
-        if name not in self.states:
-            return None
-            
-        fn = getattr(self, f"analyze_{name}", None)
-        if fn:
-            angle, feedback, counted, reps, stage, symmetry = fn(lm)
-            
-            # Check if rep count changed
-            if reps > self.last_count:
-                counted = True
-                self.last_count = reps
-                print(f"REP DETECTED! New count: {reps}")
-            elif reps < self.last_count:
-                self.last_count = reps
-            
-            # Add rep completion feedback
-            if counted and reps > 0:
-                feedback.append(f"Rep {reps} completed! 💪")
-            
-            self.current_data = {
-                'reps': reps,
-                'stage': stage,
-                'feedback': feedback,
-                'symmetry': symmetry,
-                'angle': angle
-            }
-            return self.current_data
-        return None
-
-    # --- BICEP CURLS ---
-    def analyze_bicep(self, lm):
-        try:
-            # Get landmarks for both arms
-            lsh = get_lm(lm, mp_pose.PoseLandmark.LEFT_SHOULDER)
-            lel = get_lm(lm, mp_pose.PoseLandmark.LEFT_ELBOW)
-            lwr = get_lm(lm, mp_pose.PoseLandmark.LEFT_WRIST)
-            
-            rsh = get_lm(lm, mp_pose.PoseLandmark.RIGHT_SHOULDER)
-            rel = get_lm(lm, mp_pose.PoseLandmark.RIGHT_ELBOW)
-            rwr = get_lm(lm, mp_pose.PoseLandmark.RIGHT_WRIST)
-            
-            # Calculate angles
-            left_angle = angle_between(lsh, lel, lwr)
-            right_angle = angle_between(rsh, rel, rwr)
-            
-            # Use the smaller angle (more curled arm) for rep counting
-            current_angle = min(left_angle, right_angle)
-            
-            # Apply smoothing
-            self.angle_buffers['bicep'].append(current_angle)
-            smoothed_angle = sum(self.angle_buffers['bicep']) / len(self.angle_buffers['bicep'])
-            
-            # Update rep counter
-            counted = self.states['bicep'].update(smoothed_angle)
-            
-            feedback = []
-            symmetry_diff = abs(left_angle - right_angle)
-            
-            # Form feedback
-            if smoothed_angle > 150:
-                feedback.append("Extend arms fully")
-            elif smoothed_angle < 60:
-                feedback.append("Good contraction!")
-            
-            if symmetry_diff > 25:
-                feedback.append("Keep arms symmetrical")
-                
-            if self.states['bicep'].stage == "up" and smoothed_angle < 140:
-                feedback.append("Lift higher")
-            elif self.states['bicep'].stage == "down" and smoothed_angle > 80:
-                feedback.append("Lower completely")
-                
-            return smoothed_angle, feedback, counted, self.states['bicep'].count, self.states['bicep'].stage, symmetry_diff
-            
-        except Exception as e:
-            print(f"Bicep analysis error: {e}")
-            return 0, ["Adjust position"], False, self.states['bicep'].count, "ready", 0
+monitor = ExerciseMonitor()
+current_exercise = "bicep"
 
-    # --- PUSH-UPS ---
-    def analyze_pushup(self, lm):
-        try:
-            lsh, lel, lwr = get_lm(lm, mp_pose.PoseLandmark.LEFT_SHOULDER), get_lm(lm, mp_pose.PoseLandmark.LEFT_ELBOW), get_lm(lm, mp_pose.PoseLandmark.LEFT_WRIST)
-            rsh, rel, rwr = get_lm(lm, mp_pose.PoseLandmark.RIGHT_SHOULDER), get_lm(lm, mp_pose.PoseLandmark.RIGHT_ELBOW), get_lm(lm, mp_pose.PoseLandmark.RIGHT_WRIST)
-            
-            left_angle = angle_between(lsh, lel, lwr)
-            right_angle = angle_between(rsh, rel, rwr)
-            current_angle = (left_angle + right_angle) / 2
-            
-            self.angle_buffers['pushup'].append(current_angle)
-            smoothed_angle = sum(self.angle_buffers['pushup']) / len(self.angle_buffers['pushup'])
-            
-            counted = self.states['pushup'].update(smoothed_angle)
-            
-            feedback = []
-            symmetry_diff = abs(left_angle - right_angle)
-            
-            if smoothed_angle > 150:
-                feedback.append("Arms straight")
-            elif smoothed_angle < 100:
-                feedback.append("Good depth!")
-                
-            if symmetry_diff > 20:
-                feedback.append("Balance both sides")
-                
-            return smoothed_angle, feedback, counted, self.states['pushup'].count, self.states['pushup'].stage, symmetry_diff
-            
-        except Exception as e:
-            print(f"Pushup analysis error: {e}")
-            return 0, ["Adjust position"], False, self.states['pushup'].count, "ready", 0
+# -------------------- Warm-up --------------------
+# OpenCV and MediaPipe take seconds to import and initialise, so they load in the
+# background: /status answers immediately, /ready once the pose model is usable.
+_warm_pose = None
+_warm_pose_lock = threading.Lock()
 
-    # --- SQUATS ---
-    def analyze_squat(self, lm):
-        try:
-            lhip, lk, la = get_lm(lm, mp_pose.PoseLandmark.LEFT_HIP), get_lm(lm, mp_pose.PoseLandmark.LEFT_KNEE), get_lm(lm, mp_pose.PoseLandmark.LEFT_ANKLE)
-            rhip, rk, ra = get_lm(lm, mp_pose.PoseLandmark.RIGHT_HIP), get_lm(lm, mp_pose.PoseLandmark.RIGHT_KNEE), get_lm(lm, mp_pose.PoseLandmark.RIGHT_ANKLE)
-            
-            left_angle = angle_between(lhip, lk, la)
-            right_angle = angle_between(rhip, rk, ra)
-            current_angle = (left_angle + right_angle) / 2
-            
-            self.angle_buffers['squat'].append(current_angle)
-            smoothed_angle = sum(self.angle_buffers['squat']) / len(self.angle_buffers['squat'])
-            
-            counted = self.states['squat'].update(smoothed_angle)
-            
-            feedback = []
-            symmetry_diff = abs(left_angle - right_angle)
-            
-            if smoothed_angle > 160:
-                feedback.append("Stand tall")
-            elif smoothed_angle < 90:
-                feedback.append("Excellent depth! 🔥")
-                
-            if symmetry_diff > 15:
-                feedback.append("Even weight distribution")
-                
-            return smoothed_angle, feedback, counted, self.states['squat'].count, self.states['squat'].stage, symmetry_diff
-            
-        except Exception as e:
-            print(f"Squat analysis error: {e}")
-            return 0, ["Adjust position"], False, self.states['squat'].count, "ready", 0
+def _warm_up(warmup):
+    global _warm_pose
+    with warmup.step("import_cv2"):
+        import cv2  # noqa: F401
+    with warmup.step("import_mediapipe"):
+        import pose_pipeline
+    with warmup.step("pose_model"):
+        # Run one blank frame so the TFLite graph is built before the first stream
+        import numpy as np
+        pose = pose_pipeline.create_pose()
+        pose.process(np.zeros((480, 640, 3), dtype=np.uint8))
+        with _warm_pose_lock:
+            _warm_pose = pose
 
-    # --- LUNGES ---
-    def analyze_lunge(self, lm):
-        try:
-            lhip, lk, la = get_lm(lm, mp_pose.PoseLandmark.LEFT_HIP), get_lm(lm, mp_pose.PoseLandmark.LEFT_KNEE), get_lm(lm, mp_pose.PoseLandmark.LEFT_ANKLE)
-            rhip, rk, ra = get_lm(lm, mp_pose.PoseLandmark.RIGHT_HIP), get_lm(lm, mp_pose.PoseLandmark.RIGHT_KNEE), get_lm(lm, mp_pose.PoseLandmark.RIGHT_ANKLE)
-            
-            left_angle = angle_between(lhip, lk, la)
-            right_angle = angle_between(rhip, rk, ra)
-            current_angle = min(left_angle, right_angle)  # Use the more bent knee
-            
-            self.angle_buffers['lunge'].append(current_angle)
-            smoothed_angle = sum(self.angle_buffers['lunge']) / len(self.angle_buffers['lunge'])
-            
-            counted = self.states['lunge'].update(smoothed_angle)
-            
-            feedback = []
-            symmetry_diff = abs(left_angle - right_angle)
-            
-            if smoothed_angle < 80:
-                feedback.append("Perfect lunge! 🎯")
-            elif smoothed_angle < 110:
-                feedback.append("Good form")
-                
-            if symmetry_diff > 25:
-                feedback.append("Alternate legs evenly")
-                
-            return smoothed_angle, feedback, counted, self.states['lunge'].count, self.states['lunge'].stage, symmetry_diff
-            
-        except Exception as e:
-            print(f"Lunge analysis error: {e}")
-            return 0, ["Adjust position"], False, self.states['lunge'].count, "ready", 0
+pose_warmup = Warmup("pose")
 
-    # --- SHOULDER PRESS ---
-    def analyze_shoulder(self, lm):
-        try:
-            lsh, lel, lwr = get_lm(lm, mp_pose.PoseLandmark.LEFT_SHOULDER), get_lm(lm, mp_pose.PoseLandmark.LEFT_ELBOW), get_lm(lm, mp_pose.PoseLandmark.LEFT_WRIST)
-            rsh, rel, rwr = get_lm(lm, mp_pose.PoseLandmark.RIGHT_SHOULDER), get_lm(lm, mp_pose.PoseLandmark.RIGHT_ELBOW), get_lm(lm, mp_pose.PoseLandmark.RIGHT_WRIST)
-            
-            # Vertical movement angles
-            left_angle = angle_between(lel, lsh, (lsh[0], lsh[1] - 0.3))
-            right_angle = angle_between(rel, rsh, (rsh[0], rsh[1] - 0.3))
-            current_angle = (left_angle + right_angle) / 2
-            
-            self.angle_buffers['shoulder'].append(current_angle)
-            smoothed_angle = sum(self.angle_buffers['shoulder']) / len(self.angle_buffers['shoulder'])
-            
-            counted = self.states['shoulder'].update(smoothed_angle)
-            
-            feedback = []
-            symmetry_diff = abs(left_angle - right_angle)
-            
-            if smoothed_angle > 150:
-                feedback.append("Arms fully extended! 👍")
-            elif smoothed_angle < 80:
-                feedback.append("Good press form")
-                
-            if symmetry_diff > 20:
-                feedback.append("Press evenly")
-                
-            return smoothed_angle, feedback, counted, self.states['shoulder'].count, self.states['shoulder'].stage, symmetry_diff
-            
-        except Exception as e:
-            print(f"Shoulder analysis error: {e}")
-            return 0, ["Adjust position"], False, self.states['shoulder'].count, "ready", 0
+def _take_pose():
+    """Hand the pre-warmed Pose to the first stream; later streams build their own"""
+    global _warm_pose
+    from pose_pipeline import create_pose
+    with _warm_pose_lock:
+        pose, _warm_pose = _warm_pose, None
+    return pose or create_pose()
 
-monitor = ExerciseMonitor()
-current_exercise = "bicep"
+# -------------------- Multi-person --------------------
+# /video_feed?people=N tracks up to N people (capped at MAX_GROUP_SIZE) with one
+# rep counter each; read the latest stream's from /group/data
+MAX_GROUP_SIZE = int(os.getenv("MAX_GROUP_SIZE", "8"))
+group = GroupMonitor(current_exercise, max_people=MAX_GROUP_SIZE)
+
+RECORDINGS_DIR = os.getenv("RECORDINGS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings"))
+
+# -------------------- Multi-source inference --------------------
+# Extra cameras/streams (VIDEO_SOURCES="0,rtsp://...,clip.mp4") are served by a pool
+# of INFERENCE_WORKERS processes and addressed as /video_feed?source=<id>
+_farm = None
+_farm_lock = threading.Lock()
+
+def get_farm():
+    global _farm
+    with _farm_lock:
+        if _farm is None:
+            _farm = InferenceFarm(workers=int(os.getenv("INFERENCE_WORKERS", "0")) or None).start()
+            for spec in filter(None, os.getenv("VIDEO_SOURCES", "").split(",")):
+                _farm.add_source(spec, current_exercise)
+    return _farm
+
+def _farm_source(source_id):
+    farm = get_farm()
+    return farm if source_id in farm.sources else None
+
+def _mjpeg(jpegs):
+    for jpeg in jpegs:
+        yield b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + jpeg + b"\r\n"
+
+MJPEG = "multipart/x-mixed-replace; boundary=frame"
+
+def video_stream(args):
+    """Frame generator for /video_feed's query args, or an (error, status) pair.
+    Shared with gateway.py, which streams it natively so it can stop on disconnect"""
+    global current_exercise
+    exercise = args.get("exercise", "bicep")
+    current_exercise = exercise
+    source_id = args.get("source")
+    if source_id is not None:
+        farm = _farm_source(source_id)
+        if farm is None:
+            return None, ({"error": f"Unknown source '{source_id}'"}, 404)
+        farm.set_exercise(source_id, exercise)
+        return _mjpeg(farm.frames(source_id)), None
+
+    people = args.get("people", 1, type=int)
+    if people > 1:
+        if exercise not in monitor.states:
+            return None, ({"error": f"Unknown exercise '{exercise}'"}, 400)
+        from pose_pipeline import POSE_LANDMARKER_MODEL
+        if not os.path.isfile(POSE_LANDMARKER_MODEL):
+            return None, ({"error": f"Multi-person tracking is unavailable: no pose landmarker model at "
+                                    f"{POSE_LANDMARKER_MODEL} (set POSE_LANDMARKER_MODEL)"}, 503)
+        return gen_group_frames(exercise, min(people, MAX_GROUP_SIZE)), None
+
+    return gen_frames(exercise, args.get("record") == "1"), None
 
 # -------------------- Flask Routes --------------------
 @app.route("/video_feed")
 def video_feed():
-    global current_exercise
-    exercise = request.args.get("exercise", "bicep")
-    current_exercise = exercise
-    return Response(gen_frames(exercise), mimetype="multipart/x-mixed-replace; boundary=frame")
+    stream, error = video_stream(request.args)
+    if error:
+        body, status = error
+        return jsonify(body), status
+    return Response(stream, mimetype=MJPEG)
+
+def gen_frames(exercise, record=False):
+    pose_warmup.wait()
+    import cv2
 
-def gen_frames(exercise):
     cap = cv2.VideoCapture(0)
     if not cap.isOpened():
         print("Error: Could not open webcam")
         return
 
+    recorder = None
+    if record:
+        os.makedirs(RECORDINGS_DIR, exist_ok=True)
+        path = os.path.join(RECORDINGS_DIR, f"{exercise}-{time.strftime('%Y%m%d-%H%M%S')}.lmrec")
+        recorder = LandmarkRecorder(path, metadata={"exercise": exercise, "source": "webcam"})
+        print(f"Recording landmarks to {path}")
+
     cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
     
-    with mp_pose.Pose(min_detection_confidence=0.7, min_tracking_confidence=0.7) as pose:
+    try:
+        yield from _stream_frames(cap, exercise, recorder)
+    finally:
+        cap.release()
+        if recorder:
+            recorder.close()
+
+def _stream_frames(cap, exercise, recorder):
+    from pose_pipeline import encode_jpeg, process_frame
+
+    with _take_pose() as pose:
         while True:
             success, frame = cap.read()
             if not success:
                 break
             
-            frame = cv2.flip(frame, 1)
-            image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            image.flags.writeable = False
-            results = pose.process(image)
-            image.flags.writeable = True
-            image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-
-            if results.pose_landmarks:
-                lm = results.pose_landmarks.landmark
-                data = monitor.analyze(exercise, lm)
-                
-                if data:
-                    mp_drawing.draw_landmarks(image, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
-                    
-                    # Display info
-                    cv2.putText(image, f"{exercise.upper()} REPS: {data['reps']}", (20, 40),
-                                cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                    cv2.putText(image, f"Stage: {data['stage']}", (20, 80),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
-                    cv2.putText(image, f"Angle: {data['angle']:.1f}°", (20, 110),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
-                    
-                    # Display feedback
-                    y = 150
-                    for msg in data['feedback'][:3]:
-                        cv2.putText(image, msg, (20, y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
-                        y += 30
-
-            ret, buffer = cv2.imencode(".jpg", image)
-            if not ret:
+            timestamp = time.time()
+            image, lm, data = process_frame(pose, monitor, frame, exercise, timestamp)
+            if recorder and lm:
+                recorder.add(lm, timestamp)
+
+            buffer = encode_jpeg(image)
+            if buffer is None:
                 break
             yield (b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + buffer.tobytes() + b"\r\n")
 
-    cap.release()
+def gen_group_frames(exercise, people):
+    global group
+    pose_warmup.wait()
+    import cv2
+    from pose_pipeline import create_multi_pose, encode_jpeg, process_group_frame
+
+    try:
+        landmarker = create_multi_pose(people)
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        return
+
+    cap = cv2.VideoCapture(0)
+    if not cap.isOpened():
+        print("Error: Could not open webcam")
+        landmarker.close()
+        return
+
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+    # Each stream tracks its own people so concurrent streams don't mix tracks and
+    # timestamps; /group/data and /group/reset follow the newest one
+    group = stream_group = GroupMonitor(exercise, max_people=MAX_GROUP_SIZE)
+
+    try:
+        with landmarker:
+            while True:
+                success, frame = cap.read()
+                if not success:
+                    break
+
+                # Monotonic: the landmarker's video mode rejects timestamps that go backwards
+                image, _, _ = process_group_frame(landmarker, stream_group, frame, time.monotonic())
+                buffer = encode_jpeg(image)
+                if buffer is None:
+                    break
+                yield (b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + buffer.tobytes() + b"\r\n")
+    finally:
+        cap.release()
 
 @app.route("/exercise_data")
 def exercise_data():
+    source_id = request.args.get("source")
+    if source_id is not None:
+        farm = _farm_source(source_id)
+        if farm is None:
+            return jsonify({"error": f"Unknown source '{source_id}'"}), 404
+        return jsonify(farm.data(source_id) or {})
     return jsonify(monitor.current_data)
 
 @app.route("/status")
 def status():
     return jsonify({
         "status": "Server running",
+        "ready": pose_warmup.ready,
         "exercises": list(monitor.states.keys()),
         "current_exercise": current_exercise
     })
 
+@app.route("/ready")
+def ready():
+    # History reads and writes need Mongo, so a service without it is not ready
+    return readiness_response(pose_warmup, mongo=mongo.ping)
+
+@app.route("/metrics")
+def metrics_endpoint():
+    return metrics.metrics_response()
+
 @app.route("/reset_count")
 def reset_count():
     exercise = request.args.get("exercise", "bicep")
+    user_id = request.args.get("user_id")
+    source_id = request.args.get("source")
+    if source_id is not None:
+        farm = _farm_source(source_id)
+        if farm is None:
+            return jsonify({"error": f"Unknown source '{source_id}'"}), 404
+        farm.reset(source_id, exercise)
+        return jsonify({"status": "Count reset", "exercise": exercise, "source": source_id})
     if exercise in monitor.states:
-        monitor.states[exercise].count = 0
-        monitor.states[exercise].stage = "down"
-        monitor.current_data['reps'] = 0
-        monitor.current_data['stage'] = "down"
-        monitor.last_count = 0
+        # Save the finished set before clearing it
+        if user_id and monitor.states[exercise].count > 0:
+            try:
+                get_history_store().record_exercise(user_id, exercise, monitor.states[exercise].count)
+            except Exception as e:
+                print(f"History write error: {e}")
+        monitor.reset(exercise)
     return jsonify({"status": "Count reset", "exercise": exercise})
 
+@app.route("/group/data")
+def group_data():
+    return jsonify(group.current_data)
+
+@app.route("/group/reset")
+def group_reset():
+    track = request.args.get("track", type=int)
+    if track is None and "track" in request.args:
+        return jsonify({"error": "track must be an integer"}), 400
+    if not group.reset(track):
+        return jsonify({"error": f"Unknown person '{track}'"}), 404
+    return jsonify({"status": "Count reset", "exercise": group.exercise, "track": track})
+
+@app.route("/farm/status")
+def farm_status():
+    return jsonify(get_farm().stats())
+
+@app.route("/farm/sources", methods=["POST"])
+def add_farm_source():
+    data = request_params()
+    if data is None:
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    spec = str(data.get("source", "")).strip()
+    exercise = data.get("exercise", "bicep")
+    if not spec:
+        return jsonify({"error": "source is required"}), 400
+    if not isinstance(exercise, str) or exercise not in monitor.states:
+        return jsonify({"error": f"Unknown exercise '{exercise}'"}), 400
+    source_id = get_farm().add_source(spec, exercise)
+    return jsonify({"success": True, "source": source_id})
+
+@app.route("/farm/sources/<source_id>", methods=["DELETE"])
+def remove_farm_source(source_id):
+    if not get_farm().remove_source(source_id):
+        return jsonify({"error": f"Unknown source '{source_id}'"}), 404
+    return jsonify({"success": True})
+
+@app.route("/recordings")
+def recordings():
+    files = sorted(f for f in os.listdir(RECORDINGS_DIR) if f.endswith(".lmrec")) if os.path.isdir(RECORDINGS_DIR) else []
+    return jsonify({"recordings": files})
+
+@app.route("/rescore")
+def rescore_recording():
+    name = os.path.basename(request.args.get("file", ""))
+    path = os.path.join(RECORDINGS_DIR, name)
+    if not name or not os.path.isfile(path):
+        return jsonify({"error": f"Recording '{name}' not found"}), 404
+    
+    try:
+        rescore_exercise = request.args.get("exercise") or LandmarkRecording(path).metadata.get("exercise", "bicep")
+        if rescore_exercise not in monitor.states:
+            return jsonify({"error": f"Unknown exercise '{rescore_exercise}'"}), 400
+        
+        # Fresh monitor so the live session's counters are untouched
+        data = rescore(path, rescore_exercise, ExerciseMonitor())
+        return jsonify({
+            "file": name,
+            "exercise": rescore_exercise,
+            "reps": data['reps'] if data else 0
+        })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route("/log_exercise", methods=["POST"])
+def log_exercise():
+    try:
+        data = request_params()
+        if data is None:
+            return jsonify({"error": "Request body must be a JSON object"}), 400
+        user_id = data.get("user_id")
+        exercise = data.get("exercise")
+        reps = data.get("reps")
+
+        try:
+            check_user_id(user_id)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if not isinstance(exercise, str) or exercise not in monitor.states:
+            return jsonify({"error": f"Unknown exercise '{exercise}'"}), 400
+        if not isinstance(reps, int) or isinstance(reps, bool) or reps < 0:
+            return jsonify({"error": "reps must be a non-negative integer"}), 400
+        try:
+            timestamp = to_utc(data.get("timestamp"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        get_history_store().record_exercise(user_id, exercise, reps, timestamp)
+        return jsonify({"success": True})
+
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route("/exercise_history")
+def exercise_history():
+    try:
+        user_id = request.args.get("user_id")
+        period = request.args.get("period", "day")
+        days = request.args.get("days", 30, type=int)
+
+        if not user_id:
+            return jsonify({"error": "user_id is required"}), 400
+
+        history = get_history_store().exercise_history(user_id, period, days)
+        return jsonify({
+            "success": True,
+            "user_id": user_id,
+            "period": period,
+            "history": history
+        })
+
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+# Warm up in the background once the routes are registered
+if serving_process(__name__):
+    pose_warmup.start(_warm_up)
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
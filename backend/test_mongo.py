@@ -1,4 +1,8 @@
-from db.mongo import users_col
+from db.mongo import ping, users_col
+
+ok, error = ping()
+if not ok:
+    raise SystemExit(f"❌ MongoDB not reachable: {error}")
 
 users_col.insert_one({
     "test": "MongoDB connection successful"
@@ -0,0 +1,117 @@
+# backend/warmup.py
+"""Background warm-up and readiness state for the services.
+
+Services bind and answer their /status (liveness) route immediately; heavy
+imports and model setup run in a warm-up thread, and the /ready routes
+return 503 until that has finished.
+"""
+import contextlib
+import os
+import threading
+import time
+import traceback
+
+from flask import jsonify
+
+# Set (by InferenceFarm) in the environment of worker processes that only run inference
+WORKER_ENV = "POSE_INFERENCE_WORKER"
+
+# How long a request that needs a warm resource waits before giving up with 503
+WAIT_SECONDS = float(os.getenv("WARMUP_WAIT_SECONDS", "15"))
+
+
+class Warmup:
+    def __init__(self, name):
+        self.name = name
+        self.state = "pending"
+        self.error = None
+        self.steps = {}
+        self.created = time.monotonic()
+        self.finished = None
+        self._done = threading.Event()
+
+    def start(self, fn):
+        """Run fn(self) in a daemon thread; the service is ready when it returns"""
+        def run():
+            self.state = "warming"
+            try:
+                fn(self)
+                self.state = "ready"
+            except Exception as e:
+                self.state = "failed"
+                self.error = f"{type(e).__name__}: {e}"
+                traceback.print_exc()
+            finally:
+                self.finished = time.monotonic()
+                self._done.set()
+
+        threading.Thread(target=run, name=f"warmup-{self.name}", daemon=True).start()
+        return self
+
+    @contextlib.contextmanager
+    def step(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def wait(self, timeout=WAIT_SECONDS):
+        """Block until warm-up finishes (or timeout); True if the service is ready"""
+        self._done.wait(timeout)
+        return self.ready
+
+    def status(self):
+        return {
+            "state": self.state,
+            "ready": self.ready,
+            "error": self.error,
+            "warmup_ms": self.steps,
+            "seconds_to_ready": round(self.finished - self.created, 2) if self.finished else None,
+        }
+
+
+def serving_process(module_name, debug=True):
+    """False in processes that never serve requests, so they shouldn't warm up:
+    the watcher Flask's debug reloader keeps around to restart the server, and
+    inference workers (spawned children re-import the parent's main module, and
+    with it every server module it imports). Other spawned processes, such as
+    uvicorn's --workers, do serve and warm up as usual."""
+    if module_name == "__mp_main__" or os.environ.get(WORKER_ENV):
+        return False
+    return module_name != "__main__" or not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true"
+
+
+def readiness_response(warmup, **dependencies):
+    """Flask response for a /ready route: 200 once warm and every dependency check
+    (a callable returning (ok, error)) passes, 503 (with Retry-After) before"""
+    body = {"service": warmup.name, **warmup.status()}
+    ready = warmup.ready
+    if dependencies:
+        body["dependencies"] = {}
+        for name, check in dependencies.items():
+            ok, error = check()
+            body["dependencies"][name] = {"ok": ok, "error": error}
+            ready = ready and ok
+        body["ready"] = ready
+    response = jsonify(body)
+    if not ready:
+        response.status_code = 503
+        response.headers["Retry-After"] = "1"
+    return response
+
+
+def not_ready_response(warmup):
+    """503 for a route whose resources are still warming up"""
+    response = jsonify({
+        "success": False,
+        "error": f"{warmup.name} is still starting up" if warmup.state != "failed" else warmup.error,
+        "state": warmup.state
+    })
+    response.status_code = 503
+    response.headers["Retry-After"] = "1"
+    return response
@@ -1,6 +1,7 @@
 import React, { useState, useRef, useEffect } from "react";
 import { useNavigate } from "react-router-dom";
 import { ArrowLeft, Video, Camera, Play, AlertCircle, CheckCircle, Square, RotateCcw, Volume2, VolumeX } from "lucide-react";
+import { EXERCISE_API } from "./api";
 
 export default function Exercise() {
   const navigate = useNavigate();
@@ -127,7 +128,7 @@ export default function Exercise() {
 
   const checkBackendConnection = async () => {
     try {
-      const response = await fetch('http://localhost:5000/status');
+      const response = await fetch(`${EXERCISE_API}/status`);
       if (response.ok) {
         setBackendStatus("connected");
       } else {
@@ -188,7 +189,7 @@ export default function Exercise() {
 
   const fetchAIFeedback = async () => {
     try {
-      const response = await fetch(`http://localhost:5000/exercise_data`);
+      const response = await fetch(`${EXERCISE_API}/exercise_data`);
       if (!response.ok) {
         throw new Error('Failed to fetch AI feedback');
       }
@@ -241,7 +242,7 @@ export default function Exercise() {
 
     // Reset count on backend
     try {
-      await fetch(`http://localhost:5000/reset_count?exercise=${selectedExercise}`);
+      await fetch(`${EXERCISE_API}/reset_count?exercise=${selectedExercise}`);
     } catch (error) {
       console.error("Error resetting count:", error);
     }
@@ -278,7 +279,7 @@ export default function Exercise() {
     lastFeedbackRef.current = "";
 
     try {
-      await fetch(`http://localhost:5000/reset_count?exercise=${selectedExercise}`);
+      await fetch(`${EXERCISE_API}/reset_count?exercise=${selectedExercise}`);
     } catch (error) {
       console.error("Error resetting count:", error);
     }
@@ -559,7 +560,7 @@ export default function Exercise() {
                       AI Processed Feed (with Pose Detection):
                     </div>
                     <img 
-                      src={`http://localhost:5000/video_feed?exercise=${selectedExercise}`}
+                      src={`${EXERCISE_API}/video_feed?exercise=${selectedExercise}`}
                       alt="AI Processed Feed"
                       className="w-full aspect-video rounded-lg border-2 border-teal-300 object-cover"
                     />
@@ -1,6 +1,12 @@
 import React, { useState, useEffect } from "react";
 import { useNavigate } from "react-router-dom";
 import { ArrowLeft, Search, MessageCircle, Sparkles, Utensils, Plus, X, Heart, Clock, Flame } from "lucide-react";
+import { DIET_API } from "./api";
+
+const RECOMMENDATION_FIELDS = [
+  'id', 'name', 'description', 'calories', 'protein', 'carbs', 'fat',
+  'prep_time', 'cuisine', 'similarity_score', 'hybrid_score'
+];
 
 export default function NLPDiet() {
   const navigate = useNavigate();
@@ -19,7 +25,7 @@ export default function NLPDiet() {
 
   const checkBackendStatus = async () => {
     try {
-      const response = await fetch('http://localhost:5002/diet/status');
+      const response = await fetch(`${DIET_API}/diet/status`);
       if (response.ok) {
         setBackendStatus("connected");
       } else {
@@ -38,17 +44,15 @@ export default function NLPDiet() {
   const getRecommendations = async (query, ingredients = []) => {
     setIsLoading(true);
     try {
-      const response = await fetch('http://localhost:5002/diet/recommend', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          query: query,
-          ingredients: ingredients,
-          method: 'hybrid'
-        })
+      // GET so the browser can cache results and revalidate them with the ETag;
+      // only the fields the cards render are requested
+      const params = new URLSearchParams({
+        query: query,
+        ingredients: ingredients.join(','),
+        method: 'hybrid',
+        fields: RECOMMENDATION_FIELDS.join(',')
       });
+      const response = await fetch(`${DIET_API}/diet/recommend?${params}`);
 
       const data = await response.json();
       
@@ -1,6 +1,7 @@
 import React, { useState } from "react";
 import { useNavigate } from "react-router-dom";
 import { ArrowLeft, Search, Scale, Apple, Flame, Zap, Droplets, BarChart3, Plus, Trash2 } from "lucide-react";
+import { NUTRITION_API } from "./api";
 
 export default function NutritionTracker() {
   const navigate = useNavigate();
@@ -22,7 +23,7 @@ export default function NutritionTracker() {
     setError("");
     
     try {
-      const response = await fetch('http://localhost:5003/nutrition/search', {
+      const response = await fetch(`${NUTRITION_API}/nutrition/search`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -0,0 +1,8 @@
+// Backend base URLs. Set VITE_API_URL (e.g. http://localhost:8000) to send every
+// request through the unified gateway (backend/gateway.py); otherwise each
+// service is reached on its own dev-server port.
+const gateway = import.meta.env.VITE_API_URL;
+
+export const EXERCISE_API = gateway || "http://localhost:5000";
+export const DIET_API = gateway || "http://localhost:5002";
+export const NUTRITION_API = gateway || "http://localhost:5003";